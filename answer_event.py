@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class AnswerEvent:
+    id: int
+    correct_translation: bool
+    correct_article: bool
+    old_lvl: int
+    new_lvl: int
+    due_at: Optional[float] = None
+    interval: float = 0
+    ease: Optional[float] = None
+    repetitions: int = 0
+    answered_at: float = 0.0
+    response_ms: Optional[int] = None
+
+    @property
+    def correct(self) -> bool:
+        return self.correct_translation and self.correct_article
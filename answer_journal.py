@@ -0,0 +1,57 @@
+import time
+
+from typing import Dict, List
+
+from answer_event import AnswerEvent
+from answer_stats import DayStats, rollup
+from databse_handler import DatabaseHandler
+
+
+class AnswerJournal:
+
+    def __init__(
+        self,
+        db: DatabaseHandler,
+        table_name: str,
+        max_pending: int = 20,
+        max_delay: float = 5.0,
+    ) -> None:
+        self._db = db
+        self.table_name = table_name
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self._pending: List[AnswerEvent] = []
+        self._last_flush = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, answer: AnswerEvent) -> None:
+        self._pending.append(answer)
+        if self.is_due():
+            self.flush()
+
+    def is_due(self) -> bool:
+        if not self._pending:
+            return False
+        return (
+            len(self._pending) >= self.max_pending
+            or time.monotonic() - self._last_flush >= self.max_delay
+        )
+
+    def flush(self) -> None:
+        if self._pending:
+            self._db.apply_answers(self.table_name, self._pending)
+            self._pending = []
+        self._last_flush = time.monotonic()
+
+    def pending_level_deltas(self) -> Dict[int, int]:
+        deltas: Dict[int, int] = {}
+        for answer in self._pending:
+            if answer.old_lvl != answer.new_lvl:
+                deltas[answer.old_lvl] = deltas.get(answer.old_lvl, 0) - 1
+                deltas[answer.new_lvl] = deltas.get(answer.new_lvl, 0) + 1
+        return deltas
+
+    def pending_days(self) -> Dict[int, DayStats]:
+        return rollup(self._pending)
@@ -0,0 +1,128 @@
+import unicodedata
+
+from typing import NamedTuple, Optional, Tuple
+
+ARTICLES = ("der", "die", "das")
+FORM_SEPARATOR = "\t"
+_TRANSLITERATION = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+
+
+class AnswerKey(NamedTuple):
+    article: Optional[str]
+    forms: Tuple[str, ...]
+
+    def encode(self) -> str:
+        return FORM_SEPARATOR.join(self.forms)
+
+    @classmethod
+    def decode(cls, article: Optional[str], forms: str) -> "AnswerKey":
+        return cls(article, tuple(forms.split(FORM_SEPARATOR)))
+
+
+class Grade(NamedTuple):
+    correct_translation: bool
+    correct_article: bool
+    distance: int = 0
+
+    @property
+    def correct(self) -> bool:
+        return self.correct_translation and self.correct_article
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFC", text).lower().translate(_TRANSLITERATION)
+    return " ".join(text.casefold().split())
+
+
+def split_article(text: str) -> Tuple[Optional[str], str]:
+    article, _, rest = text.partition(" ")
+    if rest and article in ARTICLES:
+        return article, rest
+    return None, text
+
+
+def is_missing(value: Optional[str]) -> bool:
+    return value is None or value != value or not str(value).strip()
+
+
+def expand_plural(deutsch: str, plural: Optional[str]) -> Optional[str]:
+    if is_missing(plural):
+        return None
+    plural = " ".join(str(plural).split())
+    if plural.startswith("-"):
+        plural = str(deutsch) + plural[1:]
+    return plural
+
+
+def answer_key(
+    article: Optional[str], deutsch: str, plural: Optional[str] = None
+) -> AnswerKey:
+    noun = normalize(str(deutsch))
+    forms = [noun]
+    plural = expand_plural(deutsch, plural)
+    if plural is not None:
+        _, plural_form = split_article(normalize(plural))
+        if plural_form and plural_form not in forms:
+            forms.append(plural_form)
+    expected_article = None if is_missing(article) else normalize(str(article))
+    return AnswerKey(expected_article, tuple(forms))
+
+
+def max_typos(length: int) -> int:
+    if length < 4:
+        return 0
+    if length < 8:
+        return 1
+    return 2
+
+
+def bounded_distance(a: str, b: str, limit: int) -> int:
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    shortest = min(len(a), len(b))
+    prefix = 0
+    while prefix < shortest and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < shortest - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    a = a[prefix : len(a) - suffix]
+    b = b[prefix : len(b) - suffix]
+    if not a or not b:
+        return len(a) + len(b)
+    if len(a) > len(b):
+        a, b = b, a
+    before = previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i] + [limit + 1] * len(b)
+        low = max(1, i - limit)
+        high = min(len(b), i + limit)
+        best = limit + 1 if low > 1 else i
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (char != b[j - 1])
+            cost = min(cost, previous[j] + 1, current[j - 1] + 1)
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1]:
+                cost = min(cost, before[j - 2] + 1)
+            current[j] = cost
+            best = min(best, cost)
+        if best > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[len(b)]
+
+
+def grade(key: AnswerKey, response: str) -> Grade:
+    article, text = split_article(normalize(response))
+    correct_article = article == key.article
+    if text in key.forms:
+        return Grade(True, correct_article, 0)
+
+    closest = None
+    for form in key.forms:
+        limit = max_typos(len(form))
+        distance = bounded_distance(text, form, limit)
+        if distance <= limit:
+            return Grade(True, correct_article, distance)
+        if closest is None or distance < closest:
+            closest = distance
+    return Grade(False, correct_article, closest or 0)
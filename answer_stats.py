@@ -0,0 +1,63 @@
+from datetime import date
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from answer_event import AnswerEvent
+
+
+class DayStats(NamedTuple):
+    day: int
+    answers: int = 0
+    correct: int = 0
+    response_ms: int = 0
+    timed: int = 0
+
+    @property
+    def accuracy(self) -> Optional[float]:
+        return self.correct / self.answers if self.answers else None
+
+    @property
+    def mean_response_ms(self) -> Optional[float]:
+        return self.response_ms / self.timed if self.timed else None
+
+    def merged(self, other: "DayStats") -> "DayStats":
+        return DayStats(
+            self.day,
+            self.answers + other.answers,
+            self.correct + other.correct,
+            self.response_ms + other.response_ms,
+            self.timed + other.timed,
+        )
+
+
+def day_of(timestamp: float) -> int:
+    return date.fromtimestamp(timestamp).toordinal()
+
+
+def today() -> int:
+    return date.today().toordinal()
+
+
+def answer_stats(answer: AnswerEvent) -> DayStats:
+    return DayStats(
+        day_of(answer.answered_at),
+        1,
+        int(answer.correct),
+        answer.response_ms or 0,
+        int(answer.response_ms is not None),
+    )
+
+
+def rollup(answers: Iterable[AnswerEvent]) -> Dict[int, DayStats]:
+    days: Dict[int, DayStats] = {}
+    for answer in answers:
+        stats = answer_stats(answer)
+        days[stats.day] = days[stats.day].merged(stats) if stats.day in days else stats
+    return days
+
+
+def total(days: Iterable[DayStats], first_day: int, last_day: int) -> DayStats:
+    result = DayStats(last_day)
+    for stats in days:
+        if first_day <= stats.day <= last_day:
+            result = result.merged(stats)
+    return result
@@ -0,0 +1,448 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from typing import Any, Callable, Dict, Iterator, List
+from PyQt5.QtCore import QCoreApplication
+from csv_reader import CsvReader
+from databse_handler import DatabaseHandler
+from ingestion import IngestionPipeline
+from main import Config, Worker
+from scheduler import RETIRE_INTERVAL
+from word import MAX_LVL, Word
+from word_store import WordStore
+
+TABLE_NAME = "de_en_vocabulary"
+ARTICLES = ["der", "die", "das", None]
+LEVELS = ["A1", "A2", "B1", "B2", "C1"]
+STARTUP_SCRIPT = """
+import sys
+from config import Config
+from session import Session
+session = Session(Config("", "", "", sys.argv[1], sys.argv[2]))
+session.open()
+if not session.needs_import():
+    session.load_new_word()
+session.close()
+"""
+
+
+def generate_deck(rows: int, batch_size: int = 10000, seed: int = 0) -> Iterator[pd.DataFrame]:
+    rng = random.Random(seed)
+    for start in range(1, rows + 1, batch_size):
+        ids = range(start, min(start + batch_size, rows + 1))
+        yield pd.DataFrame(
+            {
+                "id": list(ids),
+                "Level": [rng.choice(LEVELS) for _ in ids],
+                "Artikel": [rng.choice(ARTICLES) for _ in ids],
+                "Deutsch": [f"Wort{i}" for i in ids],
+                "Plural": [f"Wörter{i}" for i in ids],
+                "Englisch": [f"word {i}" for i in ids],
+                "Beispielsatz": [f"Das ist das Wort{i}." for i in ids],
+            },
+            columns=CsvReader._required_columns,
+        )
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    count = len(ordered)
+
+    def percentile(p: float) -> float:
+        return ordered[min(count - 1, int(count * p / 100))] * 1e6
+
+    return {
+        "count": count,
+        "mean_us": sum(ordered) / count * 1e6,
+        "p50_us": percentile(50),
+        "p95_us": percentile(95),
+        "p99_us": percentile(99),
+        "max_us": ordered[-1] * 1e6,
+    }
+
+
+def time_calls(call: Callable[[int], Any], iterations: int) -> List[float]:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        call(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_import(db_name: str, rows: int, mode: str) -> Dict[str, Any]:
+    db = DatabaseHandler(db_name)
+    if mode == "sync":
+        report = db.sync_batches_into_db(TABLE_NAME, generate_deck(rows))
+    else:
+        batches = generate_deck(rows)
+        first_batch = next(batches)
+        db.initialize_db_by_df(TABLE_NAME, first_batch)
+        if mode == "legacy":
+            report = db.insert_df_into_db(TABLE_NAME, first_batch)
+            for batch in batches:
+                report.rows += db.insert_df_into_db(TABLE_NAME, batch).rows
+            report.seconds = 0.0
+        else:
+            report = db.insert_batches_into_db(TABLE_NAME, [first_batch])
+            report.rows += db.insert_batches_into_db(TABLE_NAME, batches).rows
+    db.close()
+    return {
+        "benchmark": f"import.{mode}",
+        "rows": rows,
+        "seconds": report.seconds,
+        "rows_per_second": report.rows_per_second,
+    }
+
+
+def bench_import_timed(db_name: str, rows: int, mode: str) -> Dict[str, Any]:
+    if os.path.exists(db_name):
+        os.remove(db_name)
+    start = time.perf_counter()
+    result = bench_import(db_name, rows, mode)
+    result["seconds"] = time.perf_counter() - start
+    result["rows_per_second"] = rows / result["seconds"]
+    return result
+
+
+def bench_ingestion(workdir: str, rows: int, workers: int) -> Dict[str, Any]:
+    csv_path = os.path.join(workdir, f"deck_{rows}.csv")
+    if not os.path.exists(csv_path):
+        for index, batch in enumerate(generate_deck(rows)):
+            batch.to_csv(csv_path, mode="a", header=index == 0, index=False)
+    pipeline = IngestionPipeline(
+        CsvReader._required_columns, os.path.join(workdir, "rejects.csv"), workers
+    )
+    start = time.perf_counter()
+    for _ in pipeline.run(CsvReader().read_raw_batches(csv_path)):
+        pass
+    seconds = time.perf_counter() - start
+    return {
+        "benchmark": f"ingestion.workers_{workers}",
+        "rows": rows,
+        "rejected": pipeline.rejected,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds,
+    }
+
+
+def bench_selection(db_name: str, rows: int, iterations: int) -> List[Dict[str, Any]]:
+    db = DatabaseHandler(db_name)
+
+    def random_row(i: int) -> None:
+        db.get_random_row(TABLE_NAME, 20)
+
+    def due_rows(i: int) -> None:
+        db.get_due_rows(TABLE_NAME, 10, 20, time.time())
+
+    results = []
+    for name, call in (("next_word.random", random_row), ("next_word.due", due_rows)):
+        samples = time_calls(call, iterations)
+        results.append({"benchmark": name, "rows": rows, **summarize(samples)})
+    db.close()
+    return results
+
+
+def bench_search(db_name: str, rows: int, iterations: int) -> List[Dict[str, Any]]:
+    db = DatabaseHandler(db_name)
+    start = time.perf_counter()
+    db.create_search_index(TABLE_NAME)
+    results: List[Dict[str, Any]] = [
+        {
+            "benchmark": "search.index",
+            "rows": rows,
+            "seconds": time.perf_counter() - start,
+        }
+    ]
+    rng = random.Random(1)
+    ids = [rng.randint(1, rows) for _ in range(iterations)]
+    queries = (
+        ("search.prefix", lambda i: db.search(TABLE_NAME, "Wo")),
+        ("search.substring", lambda i: db.search(TABLE_NAME, f"Wort{ids[i]}")),
+        ("search.next_page", lambda i: db.search(TABLE_NAME, "Wort1", after_id=ids[i])),
+        ("search.fuzzy", lambda i: db.search(TABLE_NAME, f"Wrot{ids[i]}", fuzzy=True)),
+    )
+    for name, call in queries:
+        samples = time_calls(call, iterations)
+        results.append({"benchmark": name, "rows": rows, **summarize(samples)})
+    db.close()
+    return results
+
+
+def bench_levels(db_name: str, rows: int) -> List[Dict[str, Any]]:
+    db = DatabaseHandler(db_name)
+    db._prepare_progress_table(TABLE_NAME)
+    progress = f"{TABLE_NAME}_progress"
+
+    def scramble() -> None:
+        db._cursor.execute(
+            f"UPDATE {progress} SET repetitions = abs(random()) % 8, "
+            "learned_lvl = abs(random()) % 7 - 1, due_at = 0"
+        )
+        db._connection.commit()
+
+    def legacy_reset() -> int:
+        for assignment in (
+            "learned_lvl = -1",
+            "correct_translations = 0",
+            "correct_articles = 0",
+            "incorrect_translations = 0",
+            "incorrect_articles = 0",
+            "due_at = NULL, interval = 0, ease = NULL, repetitions = 0",
+        ):
+            db._cursor.execute(f"UPDATE {progress} SET {assignment}")
+        db._connection.commit()
+        return rows
+
+    def row_by_row_recompute() -> int:
+        db._cursor.execute(
+            f"SELECT id, learned_lvl, interval, repetitions FROM {progress} "
+            "WHERE learned_lvl >= 0"
+        )
+        levels = [
+            (
+                MAX_LVL
+                if lvl >= MAX_LVL or interval >= RETIRE_INTERVAL
+                else min(repetitions, MAX_LVL - 1),
+                id,
+            )
+            for id, lvl, interval, repetitions in db._cursor.fetchall()
+        ]
+        db._cursor.executemany(f"UPDATE {progress} SET learned_lvl = ? WHERE id = ?", levels)
+        db._connection.commit()
+        return len(levels)
+
+    results = []
+    for name, call in (
+        ("levels.reset.legacy", legacy_reset),
+        ("levels.reset", lambda: db.reset_progress(TABLE_NAME)),
+        ("levels.recompute.row_by_row", row_by_row_recompute),
+        ("levels.recompute", lambda: db.recompute_levels(TABLE_NAME)),
+        ("levels.promote_level", lambda: db.shift_levels(TABLE_NAME, 1, level="A1")),
+        ("levels.demote_lvl", lambda: db.shift_levels(TABLE_NAME, -1, learned_lvl=2)),
+    ):
+        scramble()
+        start = time.perf_counter()
+        words = call()
+        results.append(
+            {
+                "benchmark": name,
+                "rows": rows,
+                "words": words,
+                "seconds": time.perf_counter() - start,
+            }
+        )
+    db.close()
+    return results
+
+
+def bench_snapshot(db_name: str, rows: int) -> List[Dict[str, Any]]:
+    db = DatabaseHandler(db_name)
+    db._prepare_progress_table(TABLE_NAME)
+    db._cursor.execute(
+        f"UPDATE {TABLE_NAME}_progress SET learned_lvl = abs(random()) % 6, "
+        "repetitions = abs(random()) % 6, correct_translations = abs(random()) % 9, "
+        "due_at = 1.8e9 + abs(random()) % 1000000, interval = abs(random()) % 30, "
+        "ease = 2.5"
+    )
+    db._connection.commit()
+    start = time.perf_counter()
+    data = db.export_progress(TABLE_NAME)
+    export_seconds = time.perf_counter() - start
+    db.reset_progress(TABLE_NAME)
+    start = time.perf_counter()
+    words = db.import_progress(TABLE_NAME, data)
+    import_seconds = time.perf_counter() - start
+    db.close()
+    snapshot = {"rows": rows, "words": words, "bytes": len(data)}
+    return [
+        {"benchmark": "snapshot.export", "seconds": export_seconds, **snapshot},
+        {
+            "benchmark": "snapshot.import",
+            "seconds": import_seconds,
+            "db_bytes": os.path.getsize(db_name),
+            **snapshot,
+        },
+    ]
+
+
+def bench_worker(db_name: str, rows: int, scheduler: str, iterations: int) -> List[Dict[str, Any]]:
+    worker = Worker(
+        Config(
+            spreadsheet_url="",
+            test_url="",
+            test_path="",
+            table_name=TABLE_NAME,
+            db_name=db_name,
+            scheduler=scheduler,
+        )
+    )
+    worker.start()
+
+    def submit(i: int) -> None:
+        worker.submit_answer(worker.get_translated_word() if i % 3 else "wrong")
+
+    def progress(i: int) -> None:
+        worker.get_progress()
+
+    expected = worker.get_translated_word()
+    responses = [expected, expected.upper(), expected[:-1], "die falsch"]
+
+    def grade(i: int) -> None:
+        worker.grade_answer(responses[i % len(responses)])
+
+    results = []
+    for name, call in (
+        ("submit_answer", submit),
+        ("progress", progress),
+        ("grade_answer", grade),
+    ):
+        samples = time_calls(call, iterations)
+        results.append(
+            {"benchmark": f"{name}.{scheduler}", "rows": rows, **summarize(samples)}
+        )
+    worker.cleanup()
+    return results
+
+
+def bench_startup(db_name: str, rows: int, runs: int) -> Dict[str, Any]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT, TABLE_NAME, db_name],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True,
+        )
+        samples.append(time.perf_counter() - start)
+    return {"benchmark": "startup.first_word", "rows": rows, **summarize(samples)}
+
+
+def bench_memory(db_name: str, rows: int) -> Dict[str, Any]:
+    db = DatabaseHandler(db_name)
+
+    tracemalloc.start()
+    words = [Word.from_tuple(row) for row in db.iter_rows(TABLE_NAME)]
+    word_list_bytes = tracemalloc.get_traced_memory()[0]
+    del words
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    store = WordStore.from_rows(db.iter_rows(TABLE_NAME))
+    store_bytes, store_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.close()
+    return {
+        "benchmark": "memory.deck",
+        "rows": rows,
+        "word_list_bytes": word_list_bytes,
+        "word_store_bytes": store_bytes,
+        "word_store_peak_bytes": store_peak,
+        "word_store_nbytes": store.nbytes,
+        "ratio": store_bytes / word_list_bytes,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the DatabaseHandler and Worker hot paths on synthetic decks."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument(
+        "--imports",
+        nargs="+",
+        default=["legacy", "bulk", "sync"],
+        choices=["legacy", "bulk", "sync"],
+    )
+    parser.add_argument(
+        "--schedulers", nargs="+", default=["sm2", "random"], choices=["sm2", "random"]
+    )
+    parser.add_argument("--legacy-limit", type=int, default=100000)
+    parser.add_argument("--startup-runs", type=int, default=10)
+    parser.add_argument("--skip-memory", action="store_true")
+    parser.add_argument("--ingest-workers", type=int, nargs="+", default=[0])
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    workdir = tempfile.mkdtemp(prefix="learn_vocab_bench_")
+    results: List[Dict[str, Any]] = []
+
+    for rows in args.sizes:
+        db_name = os.path.join(workdir, f"deck_{rows}.db")
+        for mode in args.imports:
+            if mode == "legacy" and rows > args.legacy_limit:
+                continue
+            results.append(bench_import_timed(db_name, rows, mode))
+            print(json.dumps(results[-1]))
+
+        for workers in args.ingest_workers:
+            results.append(bench_ingestion(workdir, rows, workers))
+            print(json.dumps(results[-1]))
+
+        bench_import_timed(db_name, rows, "bulk")
+        for result in bench_selection(db_name, rows, args.iterations):
+            results.append(result)
+            print(json.dumps(result))
+        for result in bench_search(db_name, rows, args.iterations):
+            results.append(result)
+            print(json.dumps(result))
+        for result in bench_levels(db_name, rows):
+            results.append(result)
+            print(json.dumps(result))
+        for result in bench_snapshot(db_name, rows):
+            results.append(result)
+            print(json.dumps(result))
+        if args.startup_runs:
+            results.append(bench_startup(db_name, rows, args.startup_runs))
+            print(json.dumps(results[-1]))
+        if not args.skip_memory:
+            results.append(bench_memory(db_name, rows))
+            print(json.dumps(results[-1]))
+
+        for scheduler in args.schedulers:
+            bench_import_timed(db_name, rows, "bulk")
+            for result in bench_worker(db_name, rows, scheduler, args.iterations):
+                results.append(result)
+                print(json.dumps(result))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(report, output, indent=2)
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+import argparse
+import json
+import sys
+import time
+
+from datetime import date
+from typing import IO, Dict, Optional
+
+from config import Config
+from databse_handler import fuzzy_searchable
+from quiz_modes import DEFAULT_MODE, QUIZ_MODES
+from session import Session
+
+
+def create_session(args: argparse.Namespace, source: str = "") -> Session:
+    session = Session(
+        Config(
+            spreadsheet_url=source,
+            test_url="",
+            test_path="",
+            table_name=args.deck,
+            db_name=args.db,
+            wal_mode=args.wal,
+            scheduler=args.scheduler,
+            user=args.user,
+            fast_import_pragmas=getattr(args, "fast_pragmas", False),
+            sync_delete_missing=getattr(args, "delete_missing", False),
+            memory_cache=getattr(args, "memory_cache", False),
+            quiz_mode=args.mode,
+            ingest_workers=getattr(args, "workers", 0),
+            rejects_path=getattr(args, "rejects", None),
+        )
+    )
+    session.words_number = args.words_number
+    session.open()
+    return session
+
+
+def deck_is_empty(session: Session, args: argparse.Namespace) -> bool:
+    if session.needs_import():
+        print(f"deck {args.deck} is empty, run the import command first", file=sys.stderr)
+        return True
+    return False
+
+
+def import_deck(args: argparse.Namespace) -> int:
+    session = create_session(args, args.source)
+    try:
+        print(session.reload_deck())
+    finally:
+        session.close()
+    return 0
+
+
+def quiz(args: argparse.Namespace) -> int:
+    session = create_session(args)
+    log: Optional[IO[str]] = open(args.log, "a", encoding="utf-8") if args.log else None
+    try:
+        if deck_is_empty(session, args):
+            return 1
+        asked = 0
+        while args.count is None or asked < args.count:
+            english = session.load_new_word()
+            if english is None:
+                print("nothing to review", file=sys.stderr)
+                break
+            print(f"[{session.get_current_learned_lvl()}] {english}", flush=True)
+            shown_at = time.monotonic()
+            line = sys.stdin.readline()
+            if not line:
+                break
+            input_text = line.rstrip("\n")
+            now = time.time()
+            response_ms = round((time.monotonic() - shown_at) * 1000)
+            id = session.get_current_word_id()
+            result = session.submit(input_text, now, response_ms)
+            if result.correct:
+                print("correct", flush=True)
+            elif result.correct_translation:
+                print(f"wrong article: {session.get_translated_word()}", flush=True)
+            else:
+                print(f"wrong: {session.get_translated_word()}", flush=True)
+            if log is not None:
+                log.write(
+                    json.dumps(
+                        {
+                            "ts": now,
+                            "deck": session.deck_name,
+                            "mode": session.mode,
+                            "id": id,
+                            "input": input_text,
+                            "response_ms": response_ms,
+                        }
+                    )
+                    + "\n"
+                )
+            session.refill_prefetch_buffer()
+            asked += 1
+        progress = session.get_progress()
+        print(
+            f"{progress.studied_words} of {progress.words_in_db} words studied",
+            file=sys.stderr,
+        )
+    finally:
+        if log is not None:
+            log.close()
+        session.close()
+    return 0
+
+
+def replay(args: argparse.Namespace) -> int:
+    session = create_session(args)
+    output: Optional[IO[str]] = (
+        open(args.output, "w", encoding="utf-8") if args.output else None
+    )
+    answers = correct = correct_translations = skipped = 0
+    start = time.perf_counter()
+    try:
+        with open(args.log, encoding="utf-8") as log:
+            for line in log:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                session.select_deck(entry.get("deck", session.deck_name))
+                session.select_mode(entry.get("mode", DEFAULT_MODE))
+                if session.mode != entry.get("mode", DEFAULT_MODE):
+                    skipped += 1
+                    continue
+                try:
+                    session.load_word(entry["id"])
+                except KeyError:
+                    skipped += 1
+                    continue
+                result = session.submit(
+                    entry["input"], entry.get("ts"), entry.get("response_ms")
+                )
+                answers += 1
+                correct += result.correct
+                correct_translations += result.correct_translation
+                if output is not None:
+                    output.write(
+                        json.dumps(
+                            {
+                                "deck": session.deck_name,
+                                "mode": session.mode,
+                                "id": entry["id"],
+                                "input": entry["input"],
+                                "correct": result.correct,
+                                "correct_translation": result.correct_translation,
+                                "correct_article": result.correct_article,
+                                "distance": result.distance,
+                                "expected": session.get_translated_word(),
+                            }
+                        )
+                        + "\n"
+                    )
+    finally:
+        if output is not None:
+            output.close()
+        session.close()
+
+    seconds = time.perf_counter() - start
+    print(
+        json.dumps(
+            {
+                "answers": answers,
+                "correct": correct,
+                "correct_translations": correct_translations,
+                "skipped": skipped,
+                "seconds": seconds,
+                "answers_per_second": answers / seconds if seconds > 0 else 0.0,
+            }
+        )
+    )
+    return 0
+
+
+def search(args: argparse.Namespace) -> int:
+    session = create_session(args)
+    try:
+        if deck_is_empty(session, args):
+            return 1
+        start = time.perf_counter()
+        rows = session.search(args.query, args.after, args.limit, args.fuzzy)
+        if not rows and not args.fuzzy and not args.after and fuzzy_searchable(args.query):
+            rows = session.search(args.query, limit=args.limit, fuzzy=True)
+        seconds = time.perf_counter() - start
+        fields = ("id", "level", "article", "deutsch", "plural", "english")
+        for row in rows:
+            print(json.dumps(dict(zip(fields, row))))
+        print(f"{len(rows)} results in {seconds * 1000:.2f} ms", file=sys.stderr)
+    finally:
+        session.close()
+    return 0
+
+
+def stats(args: argparse.Namespace) -> int:
+    session = create_session(args)
+    try:
+        if deck_is_empty(session, args):
+            return 1
+        session.trend_days = args.days
+        for day in session.get_days():
+            print(
+                json.dumps(
+                    {
+                        "day": date.fromordinal(day.day).isoformat(),
+                        "answers": day.answers,
+                        "accuracy": day.accuracy,
+                        "mean_response_ms": day.mean_response_ms,
+                    }
+                )
+            )
+        for word, answers, mistakes in session.hardest_words(args.days, args.hardest):
+            print(
+                json.dumps(
+                    {
+                        "id": word.id,
+                        "english": word.english,
+                        "deutsch": word.deutsch,
+                        "answers": answers,
+                        "mistakes": mistakes,
+                    }
+                )
+            )
+    finally:
+        session.close()
+    return 0
+
+
+def snapshot(args: argparse.Namespace) -> int:
+    session = create_session(args)
+    try:
+        if deck_is_empty(session, args):
+            return 1
+        start = time.perf_counter()
+        result: Dict[str, float]
+        if args.action == "export":
+            result = {"bytes": session.export_progress(args.path)}
+        else:
+            try:
+                result = {"words": session.import_progress(args.path, args.prefer)}
+            except ValueError as error:
+                print(f"{args.path}: {error}", file=sys.stderr)
+                return 1
+        result["seconds"] = time.perf_counter() - start
+        print(json.dumps({"action": args.action, **result}))
+    finally:
+        session.close()
+    return 0
+
+
+def levels(args: argparse.Namespace) -> int:
+    session = create_session(args)
+    try:
+        if deck_is_empty(session, args):
+            return 1
+        start = time.perf_counter()
+        if args.action == "reset":
+            changed = session.reset_progress(args.level, args.ids)
+        elif args.action == "recompute":
+            changed = session.recompute_levels(args.previous_max_lvl)
+        else:
+            delta = args.by if args.action == "promote" else -args.by
+            changed = session.shift_levels(delta, args.level, args.ids, args.lvl)
+        seconds = time.perf_counter() - start
+        print(json.dumps({"action": args.action, "words": changed, "seconds": seconds}))
+    finally:
+        session.close()
+    return 0
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Import decks, run quiz sessions or replay answer logs without the GUI."
+    )
+    parser.add_argument("--db", default="learn_language.db")
+    parser.add_argument("--deck", default="de_en_vocabulary")
+    parser.add_argument("--user", default=None)
+    parser.add_argument("--scheduler", default="sm2", choices=["sm2", "random"])
+    parser.add_argument(
+        "--words-number",
+        type=int,
+        default=20,
+        help="sm2: most words relearned at once before new ones; random: size of the pool",
+    )
+    parser.add_argument("--wal", action="store_true")
+    parser.add_argument("--mode", default=DEFAULT_MODE, choices=list(QUIZ_MODES))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="import or sync a deck from a CSV file or URL")
+    import_parser.add_argument("source")
+    import_parser.add_argument("--delete-missing", action="store_true")
+    import_parser.add_argument("--fast-pragmas", action="store_true")
+    import_parser.add_argument(
+        "--rejects", default=None, help="write rejected rows with the reason to this CSV file"
+    )
+    import_parser.add_argument(
+        "--workers", type=int, default=0, help="validate batches in this many processes"
+    )
+    import_parser.set_defaults(run=import_deck)
+
+    quiz_parser = commands.add_parser("quiz", help="ask words on stdout and read answers from stdin")
+    quiz_parser.add_argument("--count", type=int, default=None)
+    quiz_parser.add_argument("--log", default=None, help="append answers to this JSON lines file")
+    quiz_parser.set_defaults(run=quiz)
+
+    replay_parser = commands.add_parser("replay", help="grade a recorded answer log at full speed")
+    replay_parser.add_argument("log")
+    replay_parser.add_argument("--output", default=None, help="write graded answers as JSON lines")
+    replay_parser.add_argument(
+        "--memory-cache", action="store_true", help="load the whole deck into memory first"
+    )
+    replay_parser.set_defaults(run=replay)
+
+    search_parser = commands.add_parser("search", help="search the deck by substring or similar spelling")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=20)
+    search_parser.add_argument("--after", type=int, default=0, help="continue after this word id")
+    search_parser.add_argument("--fuzzy", action="store_true")
+    search_parser.set_defaults(run=search)
+
+    stats_parser = commands.add_parser(
+        "stats", help="print daily answer rollups and the hardest words"
+    )
+    stats_parser.add_argument("--days", type=int, default=7)
+    stats_parser.add_argument("--hardest", type=int, default=10)
+    stats_parser.set_defaults(run=stats)
+
+    snapshot_parser = commands.add_parser(
+        "snapshot", help="export or merge learner progress as a compressed snapshot"
+    )
+    snapshot_parser.add_argument("action", choices=["export", "import"])
+    snapshot_parser.add_argument("path")
+    snapshot_parser.add_argument(
+        "--prefer",
+        default="snapshot",
+        choices=["snapshot", "most_answered"],
+        help="which progress wins when a word exists on both sides",
+    )
+    snapshot_parser.set_defaults(run=snapshot)
+
+    levels_parser = commands.add_parser(
+        "levels", help="reset, recompute, promote or demote learning levels in bulk"
+    )
+    levels_parser.add_argument("action", choices=["reset", "recompute", "promote", "demote"])
+    levels_parser.add_argument("--level", default=None, help="only words of this CEFR level")
+    levels_parser.add_argument("--ids", type=int, nargs="+", default=None)
+    levels_parser.add_argument("--lvl", type=int, default=None, help="only words at this learning level")
+    levels_parser.add_argument("--by", type=int, default=1)
+    levels_parser.add_argument("--previous-max-lvl", type=int, default=None)
+    levels_parser.set_defaults(run=levels)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
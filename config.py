@@ -0,0 +1,27 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+
+@dataclass
+class Config:
+    spreadsheet_url: str
+    test_url: str
+    test_path: str
+    table_name: str
+    db_name: str
+    fast_import_pragmas: bool = False
+    wal_mode: bool = False
+    write_behind_answers: int = 20
+    write_behind_seconds: float = 5.0
+    sync_delete_missing: bool = False
+    cache_dir: str = "cache"
+    scheduler: str = "sm2"
+    instrumentation_path: Optional[str] = None
+    slow_query_ms: float = 50.0
+    decks: Dict[str, str] = field(default_factory=dict)
+    user: Optional[str] = None
+    busy_timeout: float = 5.0
+    memory_cache: bool = False
+    quiz_mode: str = "en_de"
+    ingest_workers: int = 0
+    rejects_path: Optional[str] = None
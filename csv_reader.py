@@ -1,5 +1,7 @@
 import pandas as pd
 
+from typing import Iterator
+
 
 class CsvReader:
     _required_columns = [
@@ -16,3 +18,17 @@ class CsvReader:
         df = pd.read_csv(file_path, encoding="utf-8")
         filtered_data = df[self._required_columns]
         return filtered_data
+
+    def read_raw_batches(
+        self, file_path: str, batch_size: int = 10000
+    ) -> Iterator[pd.DataFrame]:
+        with pd.read_csv(
+            file_path,
+            encoding="utf-8",
+            usecols=self._required_columns,
+            dtype=str,
+            keep_default_na=False,
+            chunksize=batch_size,
+        ) as reader:
+            for batch in reader:
+                yield batch[self._required_columns]
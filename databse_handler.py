@@ -1,54 +1,944 @@
-import numpy as np
-import pandas as pd
+import hashlib
+import random
 import sqlite3
+import threading
+import time
 
-from typing import Any, List, Tuple
+from itertools import chain
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
-from word import MAX_LVL, Word
+from answer_event import AnswerEvent
+from answer_matcher import (
+    AnswerKey,
+    answer_key,
+    bounded_distance,
+    max_typos,
+    normalize,
+    split_article,
+)
+from answer_stats import DayStats, day_of, rollup
+from import_report import ImportReport
+from progress_snapshot import SNAPSHOT_COLUMNS, SNAPSHOT_SCHEMA, pack, unpack
+from scheduler import RETIRE_INTERVAL
+from word import MAX_LVL
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_thread_handlers = threading.local()
+SEARCH_PREFIX_LENGTH = 3
+SEARCH_FOLDS = (
+    ("Ä", "ae"), ("Ö", "oe"), ("Ü", "ue"),
+    ("ä", "ae"), ("ö", "oe"), ("ü", "ue"), ("ß", "ss"),
+)
+TRANSLITERATION_SLACK = 2
+FUZZY_MIN_LENGTH = 3
+LEGACY_MAX_LVL = 5
+LEVEL_INDEXES = ("pool_idx", "due_idx")
+
+
+def fuzzy_searchable(query: str) -> bool:
+    return len(" ".join(query.split())) >= FUZZY_MIN_LENGTH
 
 
 class DatabaseHandler:
+    fuzzy_candidates = 100
+    snapshot_chunk_rows = 65536
+    progress_rebuild_words = 50000
+    _recomputed_lvl = (
+        "CASE WHEN learned_lvl >= :previous_max_lvl "
+        "OR interval >= :retire_interval THEN :max_lvl "
+        "ELSE MIN(repetitions, :max_lvl - 1) END"
+    )
+    _new_progress_columns = (
+        "id, learned_lvl, correct_translations, correct_articles, "
+        "incorrect_translations, incorrect_articles"
+    )
+    _progress_columns = "prog.*"
 
-    def __init__(self, db_name: str) -> None:
-        self._connection = sqlite3.connect(db_name)
+    def __init__(
+        self, db_name: str, wal: bool = False, busy_timeout: float = 5.0
+    ) -> None:
+        self._connection = sqlite3.connect(db_name, timeout=busy_timeout)
         self._cursor = self._connection.cursor()
+        if wal:
+            self._cursor.execute("PRAGMA journal_mode = WAL")
+            self._cursor.execute("PRAGMA synchronous = NORMAL")
+        self._prepared_tables: Set[str] = set()
+        self._searchable_tables: Set[str] = set()
 
-    def initialize_db_by_df(self, table_name: str, df: pd.DataFrame) -> None:
+    @classmethod
+    def for_thread(cls, db_name: str, *args: Any, **kwargs: Any) -> "DatabaseHandler":
+        handlers = _thread_handlers.__dict__.setdefault("handlers", {})
+        key = (cls, db_name, args, tuple(sorted(kwargs.items())))
+        handler = handlers.get(key)
+        if handler is None:
+            handler = handlers[key] = cls(db_name, *args, **kwargs)
+        return handler
+
+    def initialize_db_by_df(self, table_name: str, df: "pd.DataFrame") -> None:
         self._create_table_from_df(table_name, df)
         self._create_progress_table(table_name)
+        self._prepared_tables.discard(table_name)
+        self._prepare_progress_table(table_name)
+
+    def insert_df_into_db(
+        self,
+        table_name: str,
+        df: "pd.DataFrame",
+        bulk: bool = False,
+        fast_pragmas: bool = False,
+        batch_size: int = 10000,
+    ) -> ImportReport:
+        if bulk:
+            batches = (
+                df.iloc[start : start + batch_size]
+                for start in range(0, len(df), batch_size)
+            )
+            return self.insert_batches_into_db(table_name, batches, fast_pragmas)
+
+        start = time.perf_counter()
+        self._prepare_progress_table(table_name)
+        try:
+            for row in df.itertuples(index=False):
+                self._cursor.execute(
+                    f"INSERT INTO {table_name} VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (row),
+                )
+                self._cursor.execute(
+                    f"INSERT INTO {table_name}_progress ({self._new_progress_columns}) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (int(row[0]), -1, 0, 0, 0, 0),
+                )
+                self._cursor.execute(
+                    f"INSERT OR REPLACE INTO {table_name}_answers VALUES (?, ?, ?)",
+                    self._answer_row(row),
+                )
+            self._bump_deck_version(table_name)
+            self._connection.commit()
+        except BaseException:
+            self._connection.rollback()
+            raise
+        return ImportReport(len(df), time.perf_counter() - start, inserted=len(df))
+
+    def insert_batches_into_db(
+        self,
+        table_name: str,
+        batches: Iterable["pd.DataFrame"],
+        fast_pragmas: bool = False,
+    ) -> ImportReport:
+        start = time.perf_counter()
+        rows = 0
+        progress_query = (
+            f"INSERT INTO {table_name}_progress ({self._new_progress_columns}) "
+            "VALUES (?, -1, 0, 0, 0, 0)"
+        )
+        self._prepare_progress_table(table_name)
+
+        pragmas = self._set_import_pragmas() if fast_pragmas else {}
+        try:
+            self._cursor.execute("BEGIN")
+            self._cursor.execute(f"DROP TRIGGER IF EXISTS {table_name}_stats_insert")
+            for batch in batches:
+                placeholders = ", ".join("?" for _ in batch.columns)
+                columns = [batch[column].tolist() for column in batch.columns]
+                self._cursor.executemany(
+                    f"INSERT INTO {table_name} VALUES ({placeholders})",
+                    zip(*columns),
+                )
+                self._cursor.executemany(
+                    progress_query, ((int(id),) for id in columns[0])
+                )
+                self._cursor.executemany(
+                    f"INSERT OR REPLACE INTO {table_name}_answers VALUES (?, ?, ?)",
+                    map(self._answer_row, zip(*columns)),
+                )
+                rows += len(batch)
+            self._add_unstudied_words(table_name, rows)
+            self._create_stats_table(table_name)
+            self._bump_deck_version(table_name)
+            self._connection.commit()
+        except BaseException:
+            self._connection.rollback()
+            raise
+        finally:
+            self._restore_pragmas(pragmas)
+        return ImportReport(rows, time.perf_counter() - start, inserted=rows)
+
+    def sync_batches_into_db(
+        self,
+        table_name: str,
+        batches: Iterable["pd.DataFrame"],
+        delete_missing: bool = False,
+        fast_pragmas: bool = False,
+    ) -> ImportReport:
+        start = time.perf_counter()
+        batches = iter(batches)
+        first_batch = next(batches)
+        if not self.table_exists(table_name):
+            self.initialize_db_by_df(table_name, first_batch)
+        self._prepare_progress_table(table_name)
+        self._cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table_name}_hashes "
+            "(id INTEGER PRIMARY KEY, row_hash INTEGER NOT NULL)"
+        )
+
+        columns = ", ".join(first_batch.columns)
+        staging_columns = ", ".join(f"{col} TEXT" for col in first_batch.columns[1:])
+        self._cursor.execute("DROP TABLE IF EXISTS temp.sync_staging")
+        self._cursor.execute(
+            "CREATE TEMP TABLE sync_staging "
+            f"(id INTEGER PRIMARY KEY, {staging_columns}, row_hash INTEGER NOT NULL)"
+        )
+        self._cursor.execute("DROP TABLE IF EXISTS temp.sync_changed")
+        self._cursor.execute("CREATE TEMP TABLE sync_changed (id INTEGER PRIMARY KEY)")
+
+        pragmas = self._set_import_pragmas() if fast_pragmas else {}
+        try:
+            self._cursor.execute("BEGIN")
+            rows = 0
+            placeholders = ", ".join("?" for _ in range(len(first_batch.columns) + 1))
+            for batch in chain([first_batch], batches):
+                values = zip(*(batch[column].tolist() for column in batch.columns))
+                self._cursor.executemany(
+                    f"INSERT INTO sync_staging VALUES ({placeholders})",
+                    (row + (self._row_hash(row),) for row in values),
+                )
+                rows += len(batch)
 
-    def insert_df_into_db(self, table_name: str, df: pd.DataFrame) -> None:
-        for row in df.itertuples(index=False):
             self._cursor.execute(
-                f"INSERT INTO {table_name} VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (row),
+                "INSERT INTO sync_changed SELECT staging.id FROM sync_staging staging "
+                f"INNER JOIN {table_name}_progress prog ON prog.id = staging.id "
+                f"LEFT JOIN {table_name}_hashes hashes ON hashes.id = staging.id "
+                "WHERE hashes.row_hash IS NOT staging.row_hash"
             )
+            updated = self._cursor.rowcount
+            self._cursor.execute(
+                f"DELETE FROM {table_name} WHERE id IN (SELECT id FROM sync_changed)"
+            )
+            self._cursor.execute(
+                f"INSERT INTO {table_name} SELECT {columns} FROM sync_staging "
+                "WHERE id IN (SELECT id FROM sync_changed)"
+            )
+
+            self._cursor.execute(
+                f"INSERT INTO {table_name} SELECT {columns} FROM sync_staging "
+                f"WHERE id NOT IN (SELECT id FROM {table_name}_progress)"
+            )
+            inserted = self._cursor.rowcount
+            self._cursor.execute(f"DROP TRIGGER IF EXISTS {table_name}_stats_insert")
+            self._cursor.execute(
+                f"INSERT INTO {table_name}_progress ({self._new_progress_columns}) "
+                "SELECT id, -1, 0, 0, 0, 0 FROM sync_staging "
+                f"WHERE id NOT IN (SELECT id FROM {table_name}_progress)"
+            )
+            self._add_unstudied_words(table_name, inserted)
+            self._create_stats_table(table_name)
+
+            deleted = self._delete_missing_rows(table_name) if delete_missing else 0
+            if inserted or deleted:
+                self._bump_deck_version(table_name)
+
+            self._index_answers(
+                table_name,
+                "WHERE id IN (SELECT id FROM sync_changed) "
+                f"OR id NOT IN (SELECT id FROM {table_name}_answers)",
+            )
+            self._cursor.execute(
+                f"INSERT INTO {table_name}_hashes SELECT id, row_hash FROM sync_staging "
+                "WHERE true ON CONFLICT (id) DO UPDATE SET row_hash = excluded.row_hash "
+                "WHERE row_hash IS NOT excluded.row_hash"
+            )
+            self._connection.commit()
+        except BaseException:
+            self._connection.rollback()
+            raise
+        finally:
+            self._restore_pragmas(pragmas)
+            self._cursor.execute("DROP TABLE IF EXISTS temp.sync_staging")
+            self._cursor.execute("DROP TABLE IF EXISTS temp.sync_changed")
+
+        return ImportReport(
+            rows,
+            time.perf_counter() - start,
+            inserted=inserted,
+            updated=updated,
+            deleted=deleted,
+        )
+
+    def _delete_missing_rows(self, table_name: str) -> int:
+        self._cursor.execute(
+            f"DELETE FROM {table_name}_progress "
+            "WHERE id NOT IN (SELECT id FROM sync_staging)"
+        )
+        deleted = self._cursor.rowcount
+        for table in (table_name, f"{table_name}_hashes", f"{table_name}_answers"):
             self._cursor.execute(
-                f"INSERT INTO {table_name}_progress VALUES (?, ?, ?, ?, ?, ?)",
-                (int(row[0]), -1, 0, 0, 0, 0),
+                f"DELETE FROM {table} WHERE id NOT IN (SELECT id FROM sync_staging)"
+            )
+        return deleted
+
+    @staticmethod
+    def _row_hash(row: Tuple[Any, ...]) -> int:
+        digest = hashlib.blake2b(repr(row).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big", signed=True)
+
+    @staticmethod
+    def _answer_row(row: Tuple[Any, ...]) -> Tuple[int, Optional[str], str]:
+        key = answer_key(row[2], row[3], row[4])
+        return int(row[0]), key.article, key.encode()
+
+    def _index_answers(self, table_name: str, where: str = "") -> None:
+        rows = self._connection.execute(f"SELECT * FROM {table_name} {where}")
+        self._cursor.executemany(
+            f"INSERT OR REPLACE INTO {table_name}_answers VALUES (?, ?, ?)",
+            map(self._answer_row, rows),
+        )
+
+    def get_answer_key(self, table_name: str, id: int) -> Optional[AnswerKey]:
+        self._prepare_progress_table(table_name)
+        self._cursor.execute(
+            f"SELECT article, forms FROM {table_name}_answers WHERE id = ?", (id,)
+        )
+        row = self._cursor.fetchone()
+        return None if row is None else AnswerKey.decode(*row)
+
+    def create_search_index(self, table_name: str) -> None:
+        if table_name in self._searchable_tables:
+            return
+        names = [column[1] for column in self.get_table_schema(table_name)]
+        id_column = names[0]
+        columns = [names[3], names[4], names[5], names[6]]
+        fts = f"{table_name}_fts"
+        if not self.table_exists(fts):
+            self._cursor.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({', '.join(columns)}, "
+                f"content='{table_name}', content_rowid='{id_column}', "
+                "tokenize='trigram')"
+            )
+            self._cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+        new_values = ", ".join(f"NEW.{column}" for column in columns)
+        old_values = ", ".join(f"OLD.{column}" for column in columns)
+        insert = (
+            f"INSERT INTO {fts}(rowid, {', '.join(columns)}) "
+            f"VALUES (NEW.{id_column}, {new_values});"
+        )
+        delete = (
+            f"INSERT INTO {fts}({fts}, rowid, {', '.join(columns)}) "
+            f"VALUES ('delete', OLD.{id_column}, {old_values});"
+        )
+        self._cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table_name} "
+            f"BEGIN {insert} END"
+        )
+        self._cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table_name} "
+            f"BEGIN {delete} END"
+        )
+        self._cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE ON {table_name} "
+            f"BEGIN {delete} {insert} END"
+        )
+        self._create_prefix_index(table_name, names)
+        for column in (names[3], names[5]):
+            self._cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {table_name}_{column.lower()}_length_idx "
+                f"ON {table_name}(length({column}))"
             )
         self._connection.commit()
+        self._searchable_tables.add(table_name)
+
+    @staticmethod
+    def _search_prefix(value: str) -> str:
+        head = f"substr(trim({value}), 1, {SEARCH_PREFIX_LENGTH})"
+        for char, replacement in SEARCH_FOLDS:
+            head = f"replace({head}, '{char}', '{replacement}')"
+        return f"substr(lower({head}), 1, {SEARCH_PREFIX_LENGTH})"
 
-    def reset_progress(self, table_name: str) -> None:
-        self._cursor.execute(f"UPDATE {table_name}_progress SET learned_lvl = -1")
-        self._cursor.execute(f"UPDATE {table_name}_progress SET correct_translations = 0")
-        self._cursor.execute(f"UPDATE {table_name}_progress SET correct_articles = 0")
-        self._cursor.execute(f"UPDATE {table_name}_progress SET incorrect_translations = 0")
-        self._cursor.execute(f"UPDATE {table_name}_progress SET incorrect_articles = 0")
-        self._connection.commit
+    @staticmethod
+    def _search_prefixes(heads: str) -> str:
+        lengths = " UNION ALL ".join(
+            f"SELECT {length} AS length" for length in range(1, SEARCH_PREFIX_LENGTH + 1)
+        )
+        return (
+            "SELECT DISTINCT substr(head, 1, length) AS prefix, id "
+            f"FROM ({heads}), ({lengths}) WHERE length(head) >= length"
+        )
+
+    def _create_prefix_index(self, table_name: str, names: List[str]) -> None:
+        prefixes = f"{table_name}_search_prefixes"
+        id_column = names[0]
+        columns = names[3:6]
+
+        def heads(row: str, source: str = "") -> str:
+            return " UNION ALL ".join(
+                f"SELECT {row}{id_column} AS id, {self._search_prefix(row + column)} AS head"
+                f"{source}"
+                for column in columns
+            )
+
+        if not self.table_exists(prefixes):
+            self._cursor.execute(
+                f"CREATE TABLE {prefixes} (prefix TEXT NOT NULL, id INTEGER NOT NULL, "
+                "PRIMARY KEY (prefix, id)) WITHOUT ROWID"
+            )
+            self._cursor.execute(
+                f"INSERT INTO {prefixes} "
+                f"{self._search_prefixes(heads('', f' FROM {table_name}'))} "
+                "ORDER BY prefix, id"
+            )
+        insert = f"INSERT OR IGNORE INTO {prefixes} {self._search_prefixes(heads('NEW.'))};"
+        delete = (
+            f"DELETE FROM {prefixes} WHERE id = OLD.{id_column} AND prefix IN "
+            f"(SELECT prefix FROM ({self._search_prefixes(heads('OLD.'))}));"
+        )
+        self._cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {prefixes}_insert AFTER INSERT ON {table_name} "
+            f"BEGIN {insert} END"
+        )
+        self._cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {prefixes}_delete AFTER DELETE ON {table_name} "
+            f"BEGIN {delete} END"
+        )
+        self._cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {prefixes}_update AFTER UPDATE ON {table_name} "
+            f"BEGIN {delete} {insert} END"
+        )
+
+    def search(
+        self,
+        table_name: str,
+        query: str,
+        after_id: int = 0,
+        limit: int = 20,
+        fuzzy: bool = False,
+    ) -> List[Any]:
+        self.create_search_index(table_name)
+        query = " ".join(query.split())
+        if fuzzy:
+            if not fuzzy_searchable(query):
+                return []
+            return self._fuzzy_search(table_name, query, after_id, limit)
+        if len(query) < 3:
+            return self._prefix_search(table_name, query, after_id, limit)
+        return self._match(table_name, self._phrase(query), after_id, limit)
+
+    @staticmethod
+    def _phrase(text: str) -> str:
+        return '"' + text.replace('"', '""') + '"'
+
+    def _match(
+        self, table_name: str, match: str, after_id: int, limit: int
+    ) -> List[Any]:
+        self._cursor.execute(
+            f"SELECT * FROM {table_name} WHERE rowid IN "
+            f"(SELECT rowid FROM {table_name}_fts WHERE {table_name}_fts MATCH ? "
+            "AND rowid > ? ORDER BY rowid LIMIT ?) ORDER BY rowid",
+            (match, after_id, limit),
+        )
+        return self._cursor.fetchall()
+
+    def _prefix_search(
+        self, table_name: str, prefix: str, after_id: int, limit: int
+    ) -> List[Any]:
+        if not prefix:
+            self._cursor.execute(
+                f"SELECT * FROM {table_name} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (after_id, limit),
+            )
+            return self._cursor.fetchall()
+        self._cursor.execute(
+            f"SELECT * FROM {table_name} WHERE rowid IN "
+            f"(SELECT id FROM {table_name}_search_prefixes "
+            f"WHERE prefix = {self._search_prefix('?')} AND id > ? ORDER BY id LIMIT ?) "
+            "ORDER BY rowid",
+            (prefix, after_id, limit),
+        )
+        return self._cursor.fetchall()
+
+    def _fuzzy_search(
+        self, table_name: str, query: str, after_id: int, limit: int
+    ) -> List[Any]:
+        _, target = split_article(normalize(query))
+        _, raw = split_article(query.lower())
+        typos = max(1, max_typos(len(target)))
+        trigrams = {
+            text[i : i + 3] for text in (raw, target) for i in range(len(text) - 2)
+        }
+        candidates = self._trigram_candidates(table_name, trigrams) if trigrams else []
+        if not candidates:
+            candidates = self._length_candidates(table_name, len(target), typos)
+        distances: Dict[int, int] = {}
+        for id, *values in candidates:
+            fields = [normalize(value) for value in values if value is not None]
+            words = fields + [word for field in fields for word in field.split()]
+            if not words:
+                continue
+            distance = min(bounded_distance(target, word, typos) for word in words)
+            if distance <= typos and distance < distances.get(id, typos + 1):
+                distances[id] = distance
+        ids = [id for _, id in sorted((distance, id) for id, distance in distances.items())]
+        if after_id:
+            ids = ids[ids.index(after_id) + 1 :] if after_id in ids else []
+        ids = ids[:limit]
+        self._cursor.execute(
+            f"SELECT * FROM {table_name} WHERE rowid IN "
+            f"({', '.join('?' for _ in ids)})",
+            ids,
+        )
+        rows = {row[0]: row for row in self._cursor.fetchall()}
+        return [rows[id] for id in ids]
+
+    def _trigram_candidates(self, table_name: str, trigrams: Set[str]) -> List[Any]:
+        names = [column[1] for column in self.get_table_schema(table_name)]
+        columns = f"{names[3]}, {names[4]}, {names[5]}"
+        alternatives = " OR ".join(self._phrase(trigram) for trigram in trigrams)
+        match = f"{{{names[3]} {names[4]} {names[5]}}} : ({alternatives})"
+        self._cursor.execute(
+            f"SELECT rowid, {columns} FROM {table_name}_fts "
+            f"WHERE {table_name}_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, self.fuzzy_candidates),
+        )
+        return self._cursor.fetchall()
+
+    def _length_candidates(self, table_name: str, length: int, typos: int) -> List[Any]:
+        names = [column[1] for column in self.get_table_schema(table_name)]
+        columns = f"{names[0]}, {names[3]}, {names[4]}, {names[5]}"
+        lengths = sorted(
+            range(length - typos - TRANSLITERATION_SLACK, length + typos + 1),
+            key=lambda candidate: abs(candidate - length),
+        )
+        candidates: Dict[int, Any] = {}
+        for candidate in lengths:
+            for column in (names[3], names[5]):
+                remaining = self.fuzzy_candidates - len(candidates)
+                if remaining <= 0:
+                    return list(candidates.values())
+                self._cursor.execute(
+                    f"SELECT {columns} FROM {table_name} "
+                    f"WHERE length({column}) = ? LIMIT ?",
+                    (candidate, remaining),
+                )
+                for row in self._cursor.fetchall():
+                    candidates.setdefault(row[0], row)
+        return list(candidates.values())
+
+    def _add_unstudied_words(self, table_name: str, words: int) -> None:
+        self._cursor.execute(
+            f"INSERT INTO {table_name}_stats (lvl, words) VALUES (-1, ?) "
+            "ON CONFLICT (lvl) DO UPDATE SET words = words + excluded.words",
+            (words,),
+        )
+
+    def reset_progress(
+        self,
+        table_name: str,
+        level: Optional[str] = None,
+        ids: Optional[Iterable[int]] = None,
+    ) -> int:
+        return self._update_progress_set(
+            table_name,
+            "-1",
+            "correct_translations = 0, correct_articles = 0, "
+            "incorrect_translations = 0, incorrect_articles = 0, "
+            "due_at = NULL, interval = 0, ease = NULL, repetitions = 0",
+            "true",
+            {},
+            level,
+            ids,
+        )
+
+    def recompute_levels(
+        self,
+        table_name: str,
+        max_lvl: int = MAX_LVL,
+        previous_max_lvl: Optional[int] = None,
+    ) -> int:
+        return self._update_progress_set(
+            table_name,
+            self._recomputed_lvl,
+            "",
+            f"learned_lvl >= 0 AND learned_lvl IS NOT {self._recomputed_lvl}",
+            {
+                "max_lvl": max_lvl,
+                "previous_max_lvl": max_lvl if previous_max_lvl is None else previous_max_lvl,
+                "retire_interval": RETIRE_INTERVAL,
+            },
+        )
+
+    def shift_levels(
+        self,
+        table_name: str,
+        delta: int,
+        level: Optional[str] = None,
+        ids: Optional[Iterable[int]] = None,
+        learned_lvl: Optional[int] = None,
+        now: Optional[float] = None,
+    ) -> int:
+        target = "MAX(0, MIN(:max_lvl, learned_lvl + :delta))"
+        repetitions = (
+            f"CASE WHEN {target} < :max_lvl - 1 THEN {target} "
+            f"ELSE MAX(repetitions, :max_lvl - 1) END"
+        )
+        interval = (
+            f"CASE WHEN {target} = :max_lvl THEN MAX(interval, :retire_interval) "
+            f"ELSE MIN(interval, :retire_interval - 1) END"
+        )
+        assignments = f"repetitions = {repetitions}, interval = {interval}"
+        if delta < 0:
+            assignments += ", due_at = :now"
+            condition = "learned_lvl >= 0"
+        else:
+            assignments += ", due_at = COALESCE(due_at, :now)"
+            condition = "true"
+        if learned_lvl is not None:
+            condition += " AND learned_lvl = :learned_lvl"
+        return self._update_progress_set(
+            table_name,
+            f"CASE WHEN {interval} >= :retire_interval THEN :max_lvl "
+            f"ELSE MIN({repetitions}, :max_lvl - 1) END",
+            assignments,
+            condition,
+            {
+                "delta": delta,
+                "max_lvl": MAX_LVL,
+                "retire_interval": RETIRE_INTERVAL,
+                "learned_lvl": learned_lvl,
+                "now": time.time() if now is None else now,
+            },
+            level,
+            ids,
+        )
+
+    def _progress_scope(self, table_name: str) -> Tuple[str, str, Dict[str, Any]]:
+        return f"{table_name}_progress", "true", {}
+
+    def _stats_scope(self, table_name: str) -> Tuple[str, str, Dict[str, Any]]:
+        progress, scope, params = self._progress_scope(table_name)
+        return progress[: -len("progress")] + "stats", scope, params
+
+    def _owns_progress_table(self, table_name: str) -> bool:
+        return True
+
+    def _update_progress_set(
+        self,
+        table_name: str,
+        lvl: str,
+        assignments: str,
+        condition: str,
+        params: Dict[str, Any],
+        level: Optional[str] = None,
+        ids: Optional[Iterable[int]] = None,
+    ) -> int:
+        self._prepare_progress_table(table_name)
+        progress, scope, scope_params = self._progress_scope(table_name)
+        params = {**params, **scope_params}
+        whole_table = level is None and ids is None
+        if level is not None:
+            names = [column[1] for column in self.get_table_schema(table_name)]
+            condition += (
+                f" AND id IN (SELECT {names[0]} FROM {table_name} "
+                f"WHERE {names[1]} = :level)"
+            )
+            params["level"] = level
+        if assignments:
+            assignments = f"learned_lvl = {lvl}, {assignments}"
+        else:
+            assignments = f"learned_lvl = {lvl}"
+        try:
+            self._cursor.execute("BEGIN IMMEDIATE")
+            if ids is not None:
+                self._cursor.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS bulk_ids (id INTEGER PRIMARY KEY)"
+                )
+                self._cursor.execute("DELETE FROM temp.bulk_ids")
+                self._cursor.executemany(
+                    "INSERT OR IGNORE INTO temp.bulk_ids VALUES (?)",
+                    ((int(id),) for id in ids),
+                )
+                condition += " AND id IN (SELECT id FROM temp.bulk_ids)"
+
+            changes = None
+            if whole_table:
+                changes = self._rebuild_level_changes(
+                    table_name, progress, lvl, "", f"{scope} AND {condition}", params
+                )
+            schema = self._drop_progress_schema(progress) if changes is not None else []
+            self._cursor.execute(
+                f"UPDATE {progress} SET {assignments} WHERE {scope} AND {condition}",
+                params,
+            )
+            changed = self._cursor.rowcount
+            if changes is not None:
+                self._restore_progress_schema(table_name, schema, changes)
+            self._connection.commit()
+        except BaseException:
+            self._connection.rollback()
+            raise
+        return changed
+
+    def _rebuild_level_changes(
+        self,
+        table_name: str,
+        progress_table: str,
+        lvl: str,
+        source: str,
+        condition: str,
+        params: Dict[str, Any],
+    ) -> Optional[Dict[int, int]]:
+        if not self._owns_progress_table(table_name):
+            return None
+        words = sum(self.get_level_histogram(table_name).values())
+        if words < self.progress_rebuild_words:
+            return None
+        self._cursor.execute(
+            f"SELECT {progress_table}.learned_lvl, {lvl}, COUNT(*) "
+            f"FROM {progress_table}{source} WHERE {condition} GROUP BY 1, 2",
+            params,
+        )
+        groups = self._cursor.fetchall()
+        if 2 * sum(count for _, _, count in groups) < words:
+            return None
+        changes: Dict[int, int] = {}
+        for old_lvl, new_lvl, count in groups:
+            changes[old_lvl] = changes.get(old_lvl, 0) - count
+            changes[new_lvl] = changes.get(new_lvl, 0) + count
+        return changes
+
+    def _drop_progress_schema(self, progress_table: str) -> List[Tuple[str, str, str]]:
+        self._cursor.execute(
+            "SELECT type, name, sql FROM sqlite_master "
+            "WHERE tbl_name = ? AND type IN ('index', 'trigger') "
+            "AND sql IS NOT NULL",
+            (progress_table,),
+        )
+        schema = self._cursor.fetchall()
+        for type, name, _ in schema:
+            self._cursor.execute(f"DROP {type.upper()} {name}")
+        return schema
+
+    def _restore_progress_schema(
+        self,
+        table_name: str,
+        schema: List[Tuple[str, str, str]],
+        changes: Dict[int, int],
+    ) -> None:
+        for _, _, sql in schema:
+            self._cursor.execute(sql)
+        self._adjust_stats(table_name, changes)
+
+    def _adjust_stats(self, table_name: str, changes: Dict[int, int]) -> None:
+        stats, _, params = self._stats_scope(table_name)
+        keys = "".join(f"{key}, " for key in params)
+        values = "".join(f":{key}, " for key in params)
+        self._cursor.executemany(
+            f"INSERT INTO {stats} ({keys}lvl, words) VALUES ({values}:lvl, :words) "
+            f"ON CONFLICT ({keys}lvl) DO UPDATE SET words = words + excluded.words",
+            ({**params, "lvl": lvl, "words": words} for lvl, words in changes.items()),
+        )
+
+    def export_progress(self, table_name: str) -> bytes:
+        self._prepare_progress_table(table_name)
+        progress, scope, params = self._progress_scope(table_name)
+        self._cursor.execute(
+            f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM {progress} "
+            f"WHERE {scope} AND learned_lvl >= 0 ORDER BY id",
+            params,
+        )
+        chunks = iter(lambda: self._cursor.fetchmany(self.snapshot_chunk_rows), [])
+        return pack(chunks, MAX_LVL)
+
+    def import_progress(
+        self, table_name: str, data: bytes, prefer: str = "snapshot"
+    ) -> int:
+        if prefer not in ("snapshot", "most_answered"):
+            raise ValueError(f"unknown snapshot merge preference: {prefer}")
+        header, rows = unpack(data)
+        self._prepare_progress_table(table_name)
+        progress, scope, scope_params = self._progress_scope(table_name)
+        names = [column[1] for column in self.get_table_schema(table_name)]
+
+        def lvl(row: str) -> str:
+            return (
+                f"CASE WHEN {row}.learned_lvl >= :snapshot_max_lvl THEN :max_lvl "
+                f"ELSE MIN({row}.learned_lvl, :max_lvl) END"
+            )
+
+        def preferred(row: str) -> str:
+            if prefer == "snapshot":
+                return "true"
+            return (
+                f"{row}.correct_translations + {row}.incorrect_translations >= "
+                f"{progress}.correct_translations + {progress}.incorrect_translations"
+            )
+
+        keys = [*scope_params, "id"]
+        columns = [*scope_params, *SNAPSHOT_COLUMNS]
+        values = [f":{key}" for key in scope_params]
+        values += [f"snap.{column}" for column in SNAPSHOT_COLUMNS]
+        assignments = [f"learned_lvl = {lvl('excluded')}"]
+        assignments += [
+            f"{column} = excluded.{column}" for column in SNAPSHOT_COLUMNS[2:]
+        ]
+        params = {
+            **scope_params,
+            "max_lvl": MAX_LVL,
+            "snapshot_max_lvl": header.max_lvl,
+        }
+        try:
+            self._cursor.execute("BEGIN IMMEDIATE")
+            self._cursor.execute(
+                f"CREATE TEMP TABLE snapshot_progress ({SNAPSHOT_SCHEMA})"
+            )
+            try:
+                self._cursor.executemany(
+                    "INSERT INTO temp.snapshot_progress VALUES "
+                    f"({', '.join('?' for _ in SNAPSHOT_COLUMNS)})",
+                    rows,
+                )
+            except sqlite3.IntegrityError as error:
+                raise ValueError(f"corrupt progress snapshot: {error}") from error
+
+            changes = self._rebuild_level_changes(
+                table_name,
+                progress,
+                lvl("snap"),
+                ", temp.snapshot_progress AS snap",
+                f"{progress}.id = snap.id AND {scope} "
+                f"AND snap.learned_lvl >= 0 AND {preferred('snap')}",
+                params,
+            )
+            schema = self._drop_progress_schema(progress) if changes is not None else []
+            self._cursor.execute(
+                f"INSERT INTO {progress} ({', '.join(columns)}) "
+                f"SELECT {', '.join(values)} FROM temp.snapshot_progress AS snap "
+                f"WHERE snap.learned_lvl >= 0 "
+                f"AND snap.id IN (SELECT {names[0]} FROM {table_name}) "
+                f"ON CONFLICT ({', '.join(keys)}) DO UPDATE "
+                f"SET {', '.join(assignments)} WHERE {preferred('excluded')}",
+                params,
+            )
+            changed = self._cursor.rowcount
+            if changes is not None:
+                self._restore_progress_schema(table_name, schema, changes)
+            self._cursor.execute("DROP TABLE temp.snapshot_progress")
+            self._connection.commit()
+        except BaseException:
+            self._connection.rollback()
+            raise
+        return changed
 
     def get_random_row(self, table_name: str, words_number: int) -> Any:
-        MAX_LVL = 5
-        query = (
-            f"SELECT * FROM {table_name} vocab "
-            f"INNER JOIN {table_name}_progress prog ON vocab.id = prog.id "
-            "WHERE vocab.id IN "
-            f"(SELECT id FROM de_en_vocabulary_progress WHERE learned_lvl < {MAX_LVL} LIMIT {words_number}) "
-            "ORDER BY RANDOM() LIMIT 1"
+        self._prepare_progress_table(table_name)
+        candidates = min(words_number, self._get_candidate_count(table_name))
+        if candidates <= 0:
+            return None
+
+        progress, scope, params = self._progress_scope(table_name)
+        self._cursor.execute(
+            f"SELECT id FROM {progress} INDEXED BY {progress}_pool_idx "
+            f"WHERE {scope} AND learned_lvl < {MAX_LVL} "
+            "ORDER BY id LIMIT 1 OFFSET :offset",
+            {**params, "offset": random.randrange(candidates)},
+        )
+        row = self._cursor.fetchone()
+        if row is None:
+            return None
+
+        return self._get_row_by_id(table_name, row[0])
+
+    def get_due_rows(
+        self, table_name: str, limit: int, words_number: int, now: float
+    ) -> List[Any]:
+        self._prepare_progress_table(table_name)
+        progress, scope, params = self._progress_scope(table_name)
+        studied = f"{scope} AND learned_lvl >= 0 AND learned_lvl < {MAX_LVL}"
+        self._cursor.execute(
+            f"SELECT id FROM {progress} INDEXED BY {progress}_due_idx "
+            f"WHERE {studied} AND due_at <= :now ORDER BY due_at LIMIT :limit",
+            {**params, "now": now, "limit": limit},
+        )
+        ids = [row[0] for row in self._cursor.fetchall()]
+
+        relearning = self.get_level_histogram(table_name).get(0, 0)
+        new_words = min(limit - len(ids), words_number - relearning)
+        if new_words > 0:
+            ids += self._get_new_ids(table_name, new_words)
+
+        if not ids:
+            self._cursor.execute(
+                f"SELECT id FROM {progress} INDEXED BY {progress}_due_idx "
+                f"WHERE {studied} ORDER BY due_at LIMIT :limit",
+                {**params, "limit": limit},
+            )
+            ids = [row[0] for row in self._cursor.fetchall()]
+        if not ids:
+            ids = self._get_new_ids(table_name, limit)
+
+        return [self._get_row_by_id(table_name, id) for id in ids]
+
+    def _get_new_ids(self, table_name: str, limit: int) -> List[int]:
+        progress, scope, params = self._progress_scope(table_name)
+        self._cursor.execute(
+            f"SELECT id FROM {progress} INDEXED BY {progress}_new_idx "
+            f"WHERE {scope} AND learned_lvl = -1 ORDER BY id LIMIT :limit",
+            {**params, "limit": limit},
+        )
+        return [row[0] for row in self._cursor.fetchall()]
+
+    def get_row(self, table_name: str, id: int) -> Any:
+        self._prepare_progress_table(table_name)
+        return self._get_row_by_id(table_name, id)
+
+    def iter_rows(self, table_name: str, batch_size: int = 10000) -> Iterator[Any]:
+        self._prepare_progress_table(table_name)
+        progress, scope, params = self._progress_scope(table_name)
+        cursor = self._connection.execute(
+            f"SELECT vocab.*, {self._progress_columns} FROM {table_name} vocab "
+            f"INNER JOIN {progress} prog ON vocab.id = prog.id "
+            f"WHERE {scope} ORDER BY vocab.id",
+            params,
+        )
+        for rows in iter(lambda: cursor.fetchmany(batch_size), []):
+            yield from rows
+
+    def _get_row_by_id(self, table_name: str, id: int) -> Any:
+        progress, scope, params = self._progress_scope(table_name)
+        self._cursor.execute(
+            f"SELECT vocab.*, {self._progress_columns} FROM {table_name} vocab "
+            f"INNER JOIN {progress} prog ON vocab.id = prog.id "
+            f"WHERE vocab.id = :id AND {scope}",
+            {**params, "id": id},
         )
-        self._cursor.execute(query)
         return self._cursor.fetchone()
 
+    def _get_candidate_count(self, table_name: str) -> int:
+        stats, scope, params = self._stats_scope(table_name)
+        self._cursor.execute(
+            f"SELECT COALESCE(SUM(words), 0) FROM {stats} "
+            f"WHERE {scope} AND lvl < {MAX_LVL}",
+            params,
+        )
+        return int(self._cursor.fetchone()[0])
+
+    def get_level_histogram(self, table_name: str) -> Dict[int, int]:
+        self._prepare_progress_table(table_name)
+        stats, scope, params = self._stats_scope(table_name)
+        self._cursor.execute(f"SELECT lvl, words FROM {stats} WHERE {scope}", params)
+        return {int(lvl): int(words) for lvl, words in self._cursor.fetchall()}
+
     def get_number_of_rows_in_table(self, table_name: str) -> int:
         self._cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
         return int(self._cursor.fetchone()[0])
@@ -66,6 +956,102 @@ class DatabaseHandler:
         )
         return int(self._cursor.fetchone()[0])
 
+    def has_words(self, table_name: str) -> bool:
+        if not self.table_exists(f"{table_name}_progress"):
+            return False
+        self._cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table_name}_progress)")
+        return bool(self._cursor.fetchone()[0])
+
+    def get_prefetch_cache(self, table_name: str) -> List[int]:
+        if not self.table_exists("prefetch_cache"):
+            return []
+        self._cursor.execute(
+            "SELECT id FROM prefetch_cache WHERE table_name = ? AND learner = ? "
+            "ORDER BY position",
+            (table_name, self._learner()),
+        )
+        return [row[0] for row in self._cursor.fetchall()]
+
+    def set_prefetch_cache(self, table_name: str, ids: Iterable[int]) -> None:
+        self._cursor.execute(
+            "CREATE TABLE IF NOT EXISTS prefetch_cache (table_name TEXT NOT NULL, "
+            "learner TEXT NOT NULL, position INTEGER NOT NULL, id INTEGER NOT NULL, "
+            "PRIMARY KEY (table_name, learner, position)) WITHOUT ROWID"
+        )
+        learner = self._learner()
+        try:
+            self._cursor.execute("BEGIN IMMEDIATE")
+            self._cursor.execute(
+                "DELETE FROM prefetch_cache WHERE table_name = ? AND learner = ?",
+                (table_name, learner),
+            )
+            self._cursor.executemany(
+                "INSERT INTO prefetch_cache VALUES (?, ?, ?, ?)",
+                (
+                    (table_name, learner, position, int(id))
+                    for position, id in enumerate(ids)
+                ),
+            )
+            self._connection.commit()
+        except BaseException:
+            self._connection.rollback()
+            raise
+
+    def _learner(self) -> str:
+        return ""
+
+    def _learner_id(self) -> int:
+        return 0
+
+    def get_source_hash(self, table_name: str) -> Optional[str]:
+        if not self.table_exists("deck_sources"):
+            return None
+        self._cursor.execute(
+            "SELECT content_hash FROM deck_sources WHERE table_name = ?",
+            (table_name,),
+        )
+        row = self._cursor.fetchone()
+        return None if row is None else row[0]
+
+    def get_deck_sources(self) -> List[Tuple[str, str, str, float]]:
+        if not self.table_exists("deck_sources"):
+            return []
+        self._cursor.execute(
+            "SELECT table_name, source, content_hash, imported_at FROM deck_sources"
+        )
+        return self._cursor.fetchall()
+
+    def set_source_hash(self, table_name: str, source: str, content_hash: str) -> None:
+        self._cursor.execute(
+            "CREATE TABLE IF NOT EXISTS deck_sources "
+            "(table_name TEXT PRIMARY KEY, source TEXT, content_hash TEXT, imported_at REAL)"
+        )
+        self._cursor.execute(
+            "INSERT OR REPLACE INTO deck_sources VALUES (?, ?, ?, ?)",
+            (table_name, source, content_hash, time.time()),
+        )
+        self._connection.commit()
+
+    def get_deck_version(self, table_name: str) -> int:
+        if not self.table_exists("deck_versions"):
+            return 0
+        self._cursor.execute(
+            "SELECT version FROM deck_versions WHERE table_name = ?", (table_name,)
+        )
+        row = self._cursor.fetchone()
+        return 0 if row is None else int(row[0])
+
+    def _bump_deck_version(self, table_name: str) -> None:
+        self._cursor.execute(
+            "CREATE TABLE IF NOT EXISTS deck_versions "
+            "(table_name TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+        self._cursor.execute(
+            "INSERT INTO deck_versions VALUES (?, 1) "
+            "ON CONFLICT (table_name) DO UPDATE SET version = version + 1",
+            (table_name,),
+        )
+
     def table_exists(self, table_name: str) -> bool:
         self._cursor.execute(
             "SELECT name FROM sqlite_master " "WHERE type='table' AND name=?",
@@ -78,68 +1064,179 @@ class DatabaseHandler:
         return self._cursor.fetchall()
 
     def set_learned_lvl(self, table_name: str, id: int, lvl: int) -> None:
-        self._cursor.execute(
-            f"UPDATE {table_name}_progress SET learned_lvl = ? WHERE id = ?",
-            (
-                lvl,
-                id,
-            ),
-        )
-        self._connection.commit()
-
-    def update_progress(
-        self, table_name: str, id: int, correct_translation: bool, correct_article: bool
-    ) -> None:
-        if correct_translation:
-            self._cursor.execute(
-                f"UPDATE {table_name}_progress "
-                "SET correct_translations = correct_translations + 1 WHERE id = ?",
-                (id,),
-            )
-        else:
+        progress, scope, params = self._progress_scope(table_name)
+        try:
+            self._cursor.execute("BEGIN IMMEDIATE")
             self._cursor.execute(
-                f"UPDATE {table_name}_progress "
-                "SET incorrect_translations = incorrect_translations + 1 WHERE id = ?",
-                (id,),
+                f"UPDATE {progress} SET learned_lvl = :lvl WHERE {scope} AND id = :id",
+                {**params, "lvl": lvl, "id": id},
             )
+            self._connection.commit()
+        except BaseException:
+            self._connection.rollback()
+            raise
 
-        if correct_article:
-            self._cursor.execute(
-                f"UPDATE {table_name}_progress "
-                "SET correct_articles = correct_articles + 1 WHERE id = ?",
-                (id,),
-            )
-        else:
-            self._cursor.execute(
-                f"UPDATE {table_name}_progress "
-                "SET incorrect_articles = incorrect_articles + 1 WHERE id = ?",
-                (id,),
+    def apply_answers(self, table_name: str, answers: Iterable[AnswerEvent]) -> None:
+        answers = list(answers)
+        progress, scope, params = self._progress_scope(table_name)
+        try:
+            self._cursor.execute("BEGIN IMMEDIATE")
+            self._cursor.executemany(
+                f"UPDATE {progress} SET "
+                "learned_lvl = :lvl, "
+                "correct_translations = correct_translations + :correct_translation, "
+                "correct_articles = correct_articles + :correct_article, "
+                "incorrect_translations = incorrect_translations + :incorrect_translation, "
+                "incorrect_articles = incorrect_articles + :incorrect_article, "
+                "due_at = :due_at, interval = :interval, ease = :ease, "
+                "repetitions = :repetitions "
+                f"WHERE {scope} AND id = :id",
+                (
+                    {
+                        **params,
+                        "lvl": answer.new_lvl,
+                        "correct_translation": int(answer.correct_translation),
+                        "correct_article": int(answer.correct_article),
+                        "incorrect_translation": int(not answer.correct_translation),
+                        "incorrect_article": int(not answer.correct_article),
+                        "due_at": answer.due_at,
+                        "interval": answer.interval,
+                        "ease": answer.ease,
+                        "repetitions": answer.repetitions,
+                        "id": answer.id,
+                    }
+                    for answer in answers
+                ),
             )
+            self._log_answers(table_name, answers)
+            self._connection.commit()
+        except BaseException:
+            self._connection.rollback()
+            raise
 
-        self._connection.commit()
-
-    def update_learning_lvl(self, table_name: str, word: Word, result: bool) -> None:
-        correct = int(word.correct_translations) + int(word.correct_articles) + 2 * int(result)
-        incorrect = int(word.incorrect_translations) + int(word.incorrect_articles) + 2 * int(not result)
-        lvl = int(MAX_LVL * correct / (correct + incorrect))
-        self._cursor.execute(
-            f"UPDATE {table_name}_progress SET learned_lvl = ? WHERE id = ?",
+    def _log_answers(self, table_name: str, answers: List[AnswerEvent]) -> None:
+        learner_id = self._learner_id()
+        self._cursor.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table_name}_answer_log")
+        first_rowid = self._cursor.fetchone()[0] + 1
+        self._cursor.executemany(
+            f"INSERT INTO {table_name}_answer_log "
+            "(rowid, user_id, answered_at, id, correct_translation, correct_article, "
+            "response_ms) VALUES (?, ?, ?, ?, ?, ?, ?)",
             (
-                lvl,
-                word.id,
+                (
+                    first_rowid + offset,
+                    learner_id,
+                    answer.answered_at,
+                    answer.id,
+                    int(answer.correct_translation),
+                    int(answer.correct_article),
+                    answer.response_ms,
+                )
+                for offset, answer in enumerate(answers)
             ),
         )
-        self._connection.commit()
+        first_rowids: Dict[int, int] = {}
+        for offset, answer in enumerate(answers):
+            first_rowids.setdefault(day_of(answer.answered_at), first_rowid + offset)
+        self._cursor.executemany(
+            f"INSERT INTO {table_name}_answer_days "
+            "(user_id, day, answers, correct, response_ms, timed, first_rowid) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (user_id, day) DO UPDATE SET "
+            "answers = answers + excluded.answers, "
+            "correct = correct + excluded.correct, "
+            "response_ms = response_ms + excluded.response_ms, "
+            "timed = timed + excluded.timed, "
+            "first_rowid = MIN(first_rowid, excluded.first_rowid)",
+            (
+                (learner_id, *stats, first_rowids[stats.day])
+                for stats in rollup(answers).values()
+            ),
+        )
+
+    def get_answer_days(self, table_name: str, first_day: int) -> List[DayStats]:
+        self._prepare_progress_table(table_name)
+        self._cursor.execute(
+            "SELECT day, answers, correct, response_ms, timed "
+            f"FROM {table_name}_answer_days "
+            "WHERE user_id = ? AND day >= ? ORDER BY day",
+            (self._learner_id(), first_day),
+        )
+        return [DayStats(*row) for row in self._cursor.fetchall()]
+
+    def get_hardest_words(
+        self, table_name: str, since: float, limit: int = 10
+    ) -> List[Tuple[int, int, int]]:
+        self._prepare_progress_table(table_name)
+        learner_id = self._learner_id()
+        self._cursor.execute(
+            f"SELECT MIN(first_rowid) FROM {table_name}_answer_days "
+            "WHERE user_id = ? AND day >= ?",
+            (learner_id, day_of(since)),
+        )
+        first_rowid = self._cursor.fetchone()[0]
+        if first_rowid is None:
+            return []
+        self._cursor.execute(
+            "SELECT id, COUNT(*) AS answers, "
+            "COUNT(*) - SUM(correct_translation AND correct_article) AS mistakes "
+            f"FROM {table_name}_answer_log "
+            "WHERE rowid >= ? AND user_id = ? AND answered_at >= ? "
+            "GROUP BY id HAVING mistakes > 0 "
+            "ORDER BY CAST(mistakes AS REAL) / answers DESC, mistakes DESC, id "
+            "LIMIT ?",
+            (first_rowid, learner_id, since, limit),
+        )
+        return self._cursor.fetchall()
 
     def close(self) -> None:
+        handlers = _thread_handlers.__dict__.get("handlers", {})
+        for key, handler in list(handlers.items()):
+            if handler is self:
+                del handlers[key]
         self._connection.close()
 
-    def __create_sql_schema_from_df(self, df: pd.DataFrame) -> str:
-        schema = ", ".join([f"{col} TEXT" for col in df.columns])
-        return schema
+    def set_trace_callback(self, callback: Optional[Callable[[str], None]]) -> None:
+        self._connection.set_trace_callback(callback)
+
+    def total_changes(self) -> int:
+        return self._connection.total_changes
+
+    def explain_query_plan(self, statement: str) -> List[str]:
+        try:
+            rows = self._connection.execute("EXPLAIN QUERY PLAN " + statement)
+            return [row[3] for row in rows.fetchall()]
+        except sqlite3.Error as error:
+            return [f"unavailable: {error}"]
+
+    def __create_sql_schema_from_df(self, df: "pd.DataFrame") -> str:
+        return self._vocab_schema(list(df.columns))
+
+    @staticmethod
+    def _vocab_schema(columns: List[str]) -> str:
+        return ", ".join(
+            [f"{columns[0]} INTEGER PRIMARY KEY"] + [f"{col} TEXT" for col in columns[1:]]
+        )
+
+    def _set_import_pragmas(self) -> Dict[str, Any]:
+        previous = {}
+        for pragma, value in (("synchronous", "OFF"), ("journal_mode", "MEMORY")):
+            self._cursor.execute(f"PRAGMA {pragma}")
+            previous[pragma] = self._cursor.fetchone()[0]
+            self._cursor.execute(f"PRAGMA {pragma} = {value}")
+        return previous
 
-    def _create_table_from_df(self, table_name: str, df: pd.DataFrame) -> None:
+    def _restore_pragmas(self, pragmas: Dict[str, Any]) -> None:
+        for pragma, value in pragmas.items():
+            self._cursor.execute(f"PRAGMA {pragma} = {value}")
+
+    def _create_table_from_df(self, table_name: str, df: "pd.DataFrame") -> None:
         self._cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+        self._cursor.execute(f"DROP TABLE IF EXISTS {table_name}_hashes")
+        self._cursor.execute(f"DROP TABLE IF EXISTS {table_name}_answers")
+        self._cursor.execute(f"DROP TABLE IF EXISTS {table_name}_fts")
+        self._cursor.execute(f"DROP TABLE IF EXISTS {table_name}_search_prefixes")
+        self._searchable_tables.discard(table_name)
 
         df_schema = self.__create_sql_schema_from_df(df)
         query = f"CREATE TABLE {table_name} ({df_schema})"
@@ -148,13 +1245,216 @@ class DatabaseHandler:
 
     def _create_progress_table(self, table_name: str) -> None:
         self._cursor.execute(f"DROP TABLE IF EXISTS {table_name}_progress")
+        self._cursor.execute(f"DROP TABLE IF EXISTS {table_name}_stats")
+        self._cursor.execute(f"DROP TABLE IF EXISTS {table_name}_answer_log")
+        self._cursor.execute(f"DROP TABLE IF EXISTS {table_name}_answer_days")
         schema = """
             id INTEGER PRIMARY KEY,
             learned_lvl INTEGER,
             correct_translations INTEGER,
             correct_articles INTEGER,
             incorrect_translations INTEGER,
-            incorrect_articles INTEGER
+            incorrect_articles INTEGER,
+            due_at REAL,
+            interval REAL NOT NULL DEFAULT 0,
+            ease REAL,
+            repetitions INTEGER NOT NULL DEFAULT 0
             """
         self._cursor.execute(f"CREATE TABLE {table_name}_progress ({schema})")
+        self._record_level_scheme(f"{table_name}_progress")
+        self._connection.commit()
+
+    def _prepare_progress_table(self, table_name: str) -> None:
+        if table_name in self._prepared_tables:
+            return
+        self._add_schedule_columns(table_name)
+        self._convert_id_column(table_name)
+        previous_max_lvl = self._drop_stale_level_indexes(f"{table_name}_progress")
+        if previous_max_lvl is not None:
+            self._cursor.execute(f"DROP TRIGGER IF EXISTS {table_name}_stats_update")
+            self._cursor.execute(f"DROP TABLE IF EXISTS {table_name}_stats")
+            self._recompute_all_levels(f"{table_name}_progress", previous_max_lvl)
+        self._cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table_name}_progress_lvl_idx "
+            f"ON {table_name}_progress(learned_lvl, id)"
+        )
+        self._cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table_name}_progress_pool_idx "
+            f"ON {table_name}_progress(id) WHERE learned_lvl < {MAX_LVL}"
+        )
+        self._cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table_name}_progress_new_idx "
+            f"ON {table_name}_progress(id) WHERE learned_lvl = -1"
+        )
+        self._cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table_name}_progress_due_idx "
+            f"ON {table_name}_progress(due_at) "
+            f"WHERE learned_lvl >= 0 AND learned_lvl < {MAX_LVL}"
+        )
+        self._create_stats_table(table_name)
+        self._create_answer_index(table_name)
+        self._create_answer_log(table_name)
+        self._connection.commit()
+        self._prepared_tables.add(table_name)
+
+    def _drop_stale_level_indexes(self, progress_table: str) -> Optional[int]:
+        row = None
+        if self.table_exists("level_schemes"):
+            self._cursor.execute(
+                "SELECT max_lvl FROM level_schemes WHERE progress_table = ?",
+                (progress_table,),
+            )
+            row = self._cursor.fetchone()
+        if row is not None and row[0] == MAX_LVL:
+            return None
+        legacy = self.table_exists(progress_table)
+        self._record_level_scheme(progress_table)
+        if row is None and not legacy:
+            return None
+        previous_max_lvl = LEGACY_MAX_LVL if row is None else int(row[0])
+        if previous_max_lvl == MAX_LVL:
+            return None
+        for index in LEVEL_INDEXES:
+            self._cursor.execute(f"DROP INDEX IF EXISTS {progress_table}_{index}")
+        return previous_max_lvl
+
+    def _record_level_scheme(self, progress_table: str) -> None:
+        self._cursor.execute(
+            "CREATE TABLE IF NOT EXISTS level_schemes "
+            "(progress_table TEXT PRIMARY KEY, max_lvl INTEGER NOT NULL)"
+        )
+        self._cursor.execute(
+            "INSERT INTO level_schemes VALUES (?, ?) "
+            "ON CONFLICT (progress_table) DO UPDATE SET max_lvl = excluded.max_lvl",
+            (progress_table, MAX_LVL),
+        )
+
+    def _recompute_all_levels(self, progress_table: str, previous_max_lvl: int) -> None:
+        self._cursor.execute(
+            f"UPDATE {progress_table} SET learned_lvl = {self._recomputed_lvl} "
+            f"WHERE learned_lvl >= 0 AND learned_lvl IS NOT {self._recomputed_lvl}",
+            {
+                "max_lvl": MAX_LVL,
+                "previous_max_lvl": previous_max_lvl,
+                "retire_interval": RETIRE_INTERVAL,
+            },
+        )
+
+    def _convert_id_column(self, table_name: str) -> None:
+        columns = self.get_table_schema(table_name)
+        if columns[0][2].upper() == "INTEGER" and columns[0][5]:
+            return
+        names = [column[1] for column in columns]
         self._connection.commit()
+        try:
+            self._cursor.execute("BEGIN IMMEDIATE")
+            self._cursor.execute(
+                f"CREATE TABLE {table_name}_typed ({self._vocab_schema(names)})"
+            )
+            self._cursor.execute(
+                f"INSERT INTO {table_name}_typed "
+                f"SELECT CAST({names[0]} AS INTEGER), {', '.join(names[1:])} "
+                f"FROM {table_name}"
+            )
+            self._cursor.execute(f"DROP TABLE {table_name}")
+            self._cursor.execute(f"ALTER TABLE {table_name}_typed RENAME TO {table_name}")
+            self._connection.commit()
+        except BaseException:
+            self._connection.rollback()
+            raise
+
+    def _add_schedule_columns(self, table_name: str) -> None:
+        columns = {column[1] for column in self.get_table_schema(f"{table_name}_progress")}
+        for column, definition in (
+            ("due_at", "REAL"),
+            ("interval", "REAL NOT NULL DEFAULT 0"),
+            ("ease", "REAL"),
+            ("repetitions", "INTEGER NOT NULL DEFAULT 0"),
+        ):
+            if column not in columns:
+                self._cursor.execute(
+                    f"ALTER TABLE {table_name}_progress ADD COLUMN {column} {definition}"
+                )
+        if "due_at" not in columns:
+            self._cursor.execute(
+                f"UPDATE {table_name}_progress SET due_at = 0, repetitions = learned_lvl "
+                "WHERE learned_lvl >= 0"
+            )
+
+    def _create_answer_index(self, table_name: str) -> None:
+        if self.table_exists(f"{table_name}_answers"):
+            return
+        self._cursor.execute(
+            f"CREATE TABLE {table_name}_answers "
+            "(id INTEGER PRIMARY KEY, article TEXT, forms TEXT NOT NULL)"
+        )
+        self._index_answers(table_name)
+
+    def _create_answer_log(self, table_name: str) -> None:
+        self._cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table_name}_answer_log ("
+            "user_id INTEGER NOT NULL, "
+            "answered_at REAL NOT NULL, "
+            "id INTEGER NOT NULL, "
+            "correct_translation INTEGER NOT NULL, "
+            "correct_article INTEGER NOT NULL, "
+            "response_ms INTEGER)"
+        )
+        self._cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table_name}_answer_days ("
+            "user_id INTEGER NOT NULL, "
+            "day INTEGER NOT NULL, "
+            "answers INTEGER NOT NULL, "
+            "correct INTEGER NOT NULL, "
+            "response_ms INTEGER NOT NULL, "
+            "timed INTEGER NOT NULL, "
+            "first_rowid INTEGER NOT NULL, "
+            "PRIMARY KEY (user_id, day)) WITHOUT ROWID"
+        )
+
+    def _create_stats_table(self, table_name: str) -> None:
+        if not self.table_exists(f"{table_name}_stats"):
+            self._cursor.execute(
+                f"CREATE TABLE {table_name}_stats "
+                "(lvl INTEGER PRIMARY KEY, words INTEGER NOT NULL)"
+            )
+            self._cursor.execute(
+                f"INSERT INTO {table_name}_stats "
+                f"SELECT learned_lvl, COUNT(*) FROM {table_name}_progress "
+                "GROUP BY learned_lvl"
+            )
+
+        self._create_stats_triggers(f"{table_name}_progress", f"{table_name}_stats", ())
+
+    def _create_stats_triggers(
+        self, progress_table: str, stats_table: str, keys: Iterable[str]
+    ) -> None:
+        keys = tuple(keys)
+        key_columns = "".join(f"{key}, " for key in keys)
+        new_keys = "".join(f"NEW.{key}, " for key in keys)
+        old_keys = "".join(f"{key} = OLD.{key} AND " for key in keys)
+        add_to_new_lvl = (
+            f"INSERT INTO {stats_table} ({key_columns}lvl, words) "
+            f"VALUES ({new_keys}NEW.learned_lvl, 1) "
+            f"ON CONFLICT ({key_columns}lvl) DO UPDATE SET words = words + 1;"
+        )
+        remove_from_old_lvl = (
+            f"UPDATE {stats_table} SET words = words - 1 "
+            f"WHERE {old_keys}lvl = OLD.learned_lvl;"
+        )
+        self._cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {stats_table}_insert "
+            f"AFTER INSERT ON {progress_table} "
+            f"BEGIN {add_to_new_lvl} END"
+        )
+        self._cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {stats_table}_delete "
+            f"AFTER DELETE ON {progress_table} "
+            f"BEGIN {remove_from_old_lvl} END"
+        )
+        self._cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {stats_table}_update "
+            f"AFTER UPDATE OF learned_lvl ON {progress_table} "
+            "WHEN OLD.learned_lvl IS NOT NEW.learned_lvl "
+            f"BEGIN {remove_from_old_lvl} {add_to_new_lvl} END"
+        )
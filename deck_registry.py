@@ -0,0 +1,50 @@
+import time
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from databse_handler import DatabaseHandler
+
+
+@dataclass
+class Deck:
+    table_name: str
+    source: str
+    content_hash: Optional[str] = None
+    imported_at: Optional[float] = None
+
+
+class DeckRegistry:
+
+    def __init__(self, db: DatabaseHandler, sources: Dict[str, str]) -> None:
+        self._db = db
+        self._sources = dict(sources)
+        self._decks: Optional[Dict[str, Deck]] = None
+
+    def _load(self) -> Dict[str, Deck]:
+        if self._decks is None:
+            decks = {
+                table_name: Deck(table_name, source)
+                for table_name, source in self._sources.items()
+            }
+            for table_name, source, content_hash, imported_at in self._db.get_deck_sources():
+                deck = decks.setdefault(table_name, Deck(table_name, source))
+                deck.content_hash = content_hash
+                deck.imported_at = imported_at
+            self._decks = decks
+        return self._decks
+
+    def __contains__(self, table_name: str) -> bool:
+        return table_name in self._load()
+
+    def names(self) -> List[str]:
+        return sorted(self._load())
+
+    def get(self, table_name: str) -> Deck:
+        return self._load()[table_name]
+
+    def mark_imported(self, table_name: str, content_hash: str) -> None:
+        deck = self.get(table_name)
+        self._db.set_source_hash(table_name, deck.source, content_hash)
+        deck.content_hash = content_hash
+        deck.imported_at = time.time()
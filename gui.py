@@ -1,38 +1,62 @@
 import os
 import sys
-from PyQt5.QtCore import pyqtSlot, QThread
+from PyQt5.QtCore import pyqtSlot, QMetaObject, Qt, QThread
 from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import (
+    QComboBox,
     QWidget,
     QHBoxLayout,
     QVBoxLayout,
 )
 from PyQt5.QtWidgets import QApplication
-from gui_widgets import GroupBox, PushButton, InputField, OutputField, StatisticsBox
+from typing import Any, Dict, List
+from answer_matcher import Grade
+from gui_widgets import (
+    GroupBox,
+    InstrumentationBox,
+    PushButton,
+    InputField,
+    OutputField,
+    SearchBox,
+    StatisticsBox,
+)
 from main import Config, Worker
 from progress import Progress
+from quiz_modes import QUIZ_MODES
 
-os.chdir(os.path.dirname(os.path.abspath(__file__)))
+WORDS_NUMBER_LABELS = {
+    "sm2": "Max number of words being relearned",
+    "random": "Number of words to be randomized",
+}
 
 
 class MainWindow(QWidget):
 
-    def __init__(self) -> None:
+    def __init__(self, config: Config) -> None:
         super().__init__()
-        self._create_ui()
-        self._start_worker()
-        self._update_ui()
-
-    def _update_ui(self) -> None:
-        new_word = self._worker.load_new_word()
+        self._create_ui(WORDS_NUMBER_LABELS[config.scheduler])
+        if config.instrumentation_path:
+            self._instrumentation = InstrumentationBox(self._label_font, self)
+            self._right_layout.addWidget(self._instrumentation)
+        self._enable_buttons(False)
+        self._start_worker(config)
         self._set_words_number(self._worker.words_number)
+
+    @pyqtSlot(str, int)
+    def _update_ui(self, new_word: str, learned_lvl: int) -> None:
         self._set_original_word(new_word)
-        progress = self._worker.get_progress()
-        self._set_progress(progress)
-        learned_lvl = self._worker.get_current_learned_lvl()
+        self._enable_buttons(True)
         self._enable_never_reask_button(learned_lvl)
 
-    def _create_ui(self) -> None:
+    @pyqtSlot()
+    def _show_nothing_to_review(self) -> None:
+        self._set_original_word("Nothing to review")
+        self._enable_buttons(True)
+        self._submit_button.setEnabled(False)
+        self._never_reask_button.setEnabled(False)
+        self._input_field.input_field.setEnabled(False)
+
+    def _create_ui(self, words_number_label: str) -> None:
 
         self.setWindowTitle("Vocabulary Learner")
         self.setGeometry(100, 100, 1000, 600)
@@ -69,8 +93,20 @@ class MainWindow(QWidget):
         self._input_field.input_field.returnPressed.connect(self._submit_input)
         test_widget.addWidget(self._input_field)
 
+        self._deck_selector = QComboBox(self)
+        self._deck_selector.setFont(label_font)
+        self._deck_selector.currentTextChanged.connect(self._deck_selected)
+        left_layout.addWidget(self._deck_selector)
+
+        self._mode_selector = QComboBox(self)
+        self._mode_selector.setFont(label_font)
+        for mode, label in QUIZ_MODES.items():
+            self._mode_selector.addItem(label, mode)
+        self._mode_selector.currentIndexChanged.connect(self._mode_selected)
+        left_layout.addWidget(self._mode_selector)
+
         self._words_number = InputField(
-            "Number of words to be randomized", label_font, element_height, parent=self
+            words_number_label, label_font, element_height, parent=self
         )
         left_layout.addWidget(self._words_number)
 
@@ -116,23 +152,39 @@ class MainWindow(QWidget):
 
         self._statistics = StatisticsBox(label_font, element_height, self)
         right_layout.addWidget(self._statistics)
+        self._search = SearchBox(label_font, self)
+        self._search.query_field.returnPressed.connect(self._search_submitted)
+        self._search.more_button.clicked.connect(self._search_more)
+        right_layout.addWidget(self._search)
+        self._right_layout = right_layout
+        self._label_font = label_font
 
         self.setLayout(main_layout)
 
-    def _start_worker(self) -> None:
-        config = Config(
-            spreadsheet_url="https://docs.google.com/spreadsheets/d/e/2PACX-1vRW9I6TdJPrc-ow1rdZO_p3_ApEK-W47aA9IwIipDNxFITxX4KaJUx5KG79MIK-XxkDHoIQNuOt5ybq/pub?gid=0&single=true&output=csv",
-            test_url="https://docs.google.com/spreadsheets/d/e/2PACX-1vTNAXHYCvnJYyVCNdPCF5JQRclv-RzW3oNvYhrHn6_QdgtIGOV3-AvNPeyWSJn7d4jAWNGWDfsUwY9t/pub?gid=0&single=true&output=csv",
-            test_path="test.csv",
-            table_name="de_en_vocabulary",
-            db_name="learn_language.db",
-        )
+    def _start_worker(self, config: Config) -> None:
         self.worker_thread = QThread()
         self._worker = Worker(config)
         self._worker.moveToThread(self.worker_thread)
-        self.worker_thread.start()
 
         self._worker.reset_to_default_finished.connect(self._reset_dict_finished)
+        self._worker.word_loaded.connect(self._update_ui)
+        self._worker.nothing_to_review.connect(self._show_nothing_to_review)
+        self._worker.answer_checked.connect(self._update_fields_values)
+        self._worker.progress_ready.connect(self._set_progress)
+        self._worker.decks_ready.connect(self._set_decks)
+        self._worker.mode_ready.connect(self._set_mode)
+        self._worker.search_results_ready.connect(self._set_search_results)
+        if config.instrumentation_path:
+            self._worker.instrumentation_ready.connect(self._set_instrumentation)
+        self.worker_thread.started.connect(self._worker.start)
+        self.worker_thread.start()
+
+    def stop_worker(self) -> None:
+        QMetaObject.invokeMethod(
+            self._worker, "cleanup", Qt.ConnectionType.BlockingQueuedConnection
+        )
+        self.worker_thread.quit()
+        self.worker_thread.wait()
 
     def _set_original_word(self, word: str) -> None:
         self._original_word.setText(word)
@@ -140,68 +192,99 @@ class MainWindow(QWidget):
     def _set_translated_word(self, word: str) -> None:
         self._translated_word.setText(word)
 
-    def _set_submitted_word(self, word: str, correct: bool) -> None:
+    def _set_submitted_word(self, word: str, result: Grade) -> None:
         self._submitted_word.setText(word)
-        if correct:
-            self._submitted_word.value.setStyleSheet("background-color: lime")
+        if result.correct:
+            style = "background-color: lime"
+        elif result.correct_translation:
+            style = "background-color: gold"
         else:
-            self._submitted_word.value.setStyleSheet("background-color: tomato")
+            style = "background-color: tomato"
+        if self._submitted_word.value.styleSheet() != style:
+            self._submitted_word.value.setStyleSheet(style)
 
     def _set_words_number(self, number: int) -> None:
         self._words_number.setText(str(number))
 
+    @pyqtSlot(object)
     def _set_progress(
         self,
         progress: Progress,
     ) -> None:
-        self._statistics.set_words_in_db(progress.words_in_db)
-        self._statistics.set_studied_words(progress.studied_words)
-        self._statistics.set_current_word_lvl(progress.current_word_lvl)
-        self._statistics.set_words_in_lvl(progress.words_in_lvl)
-
-    @pyqtSlot()
-    def _submit_input(self) -> None:
-        input_text = self._input_field.text()
+        self._statistics.set_progress(progress)
+
+    @pyqtSlot(list, str)
+    def _set_decks(self, decks: List[str], current_deck: str) -> None:
+        self._deck_selector.blockSignals(True)
+        self._deck_selector.clear()
+        self._deck_selector.addItems(decks)
+        self._deck_selector.setCurrentText(current_deck)
+        self._deck_selector.blockSignals(False)
+
+    @pyqtSlot(str)
+    def _deck_selected(self, table_name: str) -> None:
+        self._enable_buttons(False)
+        self._worker.deck_selected.emit(table_name)
 
-        result = self._worker.check_answer(input_text)
-        self._worker.update_progress_in_db(result)
+    @pyqtSlot(str)
+    def _set_mode(self, mode: str) -> None:
+        self._mode_selector.blockSignals(True)
+        self._mode_selector.setCurrentIndex(self._mode_selector.findData(mode))
+        self._mode_selector.blockSignals(False)
 
-        self._update_fields_values()
+    @pyqtSlot(int)
+    def _mode_selected(self, index: int) -> None:
+        self._enable_buttons(False)
+        self._worker.mode_selected.emit(self._mode_selector.itemData(index))
 
-    def _update_fields_values(self) -> None:
-        input_text = self._input_field.text()
-        words_number = int(self._words_number.text())
-        
-        self._worker.set_words_number(words_number)
+    @pyqtSlot()
+    def _search_submitted(self) -> None:
+        self._search.more_button.setEnabled(False)
+        self._worker.search_requested.emit(self._search.query_field.text())
 
-        translated_word = self._worker.get_translated_word()
-        self._set_translated_word(translated_word)
+    @pyqtSlot()
+    def _search_more(self) -> None:
+        self._search.more_button.setEnabled(False)
+        self._worker.search_more_requested.emit()
 
-        result = self._worker.check_answer(input_text)
-        self._set_submitted_word(input_text, result)
+    @pyqtSlot(list, bool, bool, bool)
+    def _set_search_results(
+        self, rows: List[Any], append: bool, has_more: bool, fuzzy: bool
+    ) -> None:
+        self._search.set_results(rows, append, has_more, fuzzy)
 
-        new_word = self._worker.load_new_word()
-        self._set_original_word(new_word)
+    @pyqtSlot(object)
+    def _set_instrumentation(self, snapshot: Dict[str, Any]) -> None:
+        self._instrumentation.set_snapshot(snapshot)
 
-        learned_lvl = self._worker.get_current_learned_lvl()
-        self._enable_never_reask_button(learned_lvl)
+    @pyqtSlot()
+    def _submit_input(self) -> None:
+        input_text = self._input_field.text()
+        words_number = int(self._words_number.text())
 
-        progress = self._worker.get_progress()
-        self._set_progress(progress)
+        self._worker.words_number_changed.emit(words_number)
+        self._worker.answer_submitted.emit(input_text)
 
         self._input_field.input_field.clear()
         self._input_field.input_field.setFocus()
 
+    @pyqtSlot(str, object, str)
+    def _update_fields_values(
+        self, input_text: str, result: Grade, translated_word: str
+    ) -> None:
+        self._set_translated_word(translated_word)
+        self._set_submitted_word(input_text, result)
+
     @pyqtSlot()
     def _never_reask(self) -> None:
-
         input_text = self._input_field.text()
-        result = self._worker.check_answer(input_text)
+        words_number = int(self._words_number.text())
 
-        if result:
-            self._worker.never_reask()
+        self._worker.words_number_changed.emit(words_number)
+        self._worker.never_reask_requested.emit(input_text)
 
-        self._update_fields_values()
+        self._input_field.input_field.clear()
+        self._input_field.input_field.setFocus()
 
     @pyqtSlot()
     def _reset_dict_button_clicked(self) -> None:
@@ -211,14 +294,11 @@ class MainWindow(QWidget):
     @pyqtSlot()
     def _reset_dict_finished(self) -> None:
         self._enable_buttons(True)
-        self._update_ui()
         self._input_field.input_field.setFocus()
 
     @pyqtSlot()
     def _reset_progress_button_clicked(self) -> None:
-        self._worker.reset_progress()
-        progress = self._worker.get_progress()
-        self._set_progress(progress)
+        self._worker.reset_progress_requested.emit()
         self._input_field.input_field.setFocus()
 
     def _enable_buttons(self, enable: bool = True) -> None:
@@ -228,14 +308,26 @@ class MainWindow(QWidget):
         self._reset_progress_button.setEnabled(enable)
         self._input_field.input_field.setEnabled(enable)
         self._words_number.input_field.setEnabled(enable)
+        self._deck_selector.setEnabled(enable)
+        self._mode_selector.setEnabled(enable)
 
     def _enable_never_reask_button(self, learned_lvl: int) -> None:
         self._never_reask_button.setEnabled(learned_lvl > -1)
 
-app = QApplication(sys.argv)
-main_window = MainWindow()
-main_window.show()
-try:
-    sys.exit(app.exec_())
-finally:
-    main_window._worker.cleanup()
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    config = Config(
+        spreadsheet_url="https://docs.google.com/spreadsheets/d/e/2PACX-1vRW9I6TdJPrc-ow1rdZO_p3_ApEK-W47aA9IwIipDNxFITxX4KaJUx5KG79MIK-XxkDHoIQNuOt5ybq/pub?gid=0&single=true&output=csv",
+        test_url="https://docs.google.com/spreadsheets/d/e/2PACX-1vTNAXHYCvnJYyVCNdPCF5JQRclv-RzW3oNvYhrHn6_QdgtIGOV3-AvNPeyWSJn7d4jAWNGWDfsUwY9t/pub?gid=0&single=true&output=csv",
+        test_path="test.csv",
+        table_name="de_en_vocabulary",
+        db_name="learn_language.db",
+    )
+    app = QApplication(sys.argv)
+    main_window = MainWindow(config)
+    main_window.show()
+    try:
+        sys.exit(app.exec_())
+    finally:
+        main_window.stop_worker()
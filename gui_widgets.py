@@ -1,15 +1,19 @@
-from typing import List
-from PyQt5.QtCore import Qt
+from typing import Any, Dict, List, Optional, Tuple
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import (
     QWidget,
     QLineEdit,
     QPushButton,
     QLabel,
+    QListWidget,
     QVBoxLayout,
     QHBoxLayout,
 )
 
+from progress import Progress
+from statistics_view import StatisticsView, statistics_fields
+
 
 class BorderedWidget(QWidget):
     def __init__(self, height: int, parent: QWidget):
@@ -138,51 +142,113 @@ class StatisticsField(QWidget):
 
 
 class StatisticsBox(QWidget):
+    frame_ms = 16
+
     def __init__(self, font: QFont, height: int, parent: QWidget):
         super().__init__(parent)
         self._layout = QVBoxLayout(self)
         self.setLayout(self._layout)
 
-        self._words_in_db = StatisticsField("Words in the db", font, height, self)
-        self._layout.addWidget(self._words_in_db)
-
-        self._studied_words = StatisticsField("Studied words", font, height, self)
-        self._layout.addWidget(self._studied_words)
-
-        self._current_word_lvl = StatisticsField("Current word's learning lvl", font, height, self)
-        self._layout.addWidget(self._current_word_lvl)
-
-        self._lvl_0_words = StatisticsField("Words in learning lvl 0", font, height, self)
-        self._layout.addWidget(self._lvl_0_words)
-
-        self._lvl_1_words = StatisticsField("Words in learning lvl 1", font, height, self)
-        self._layout.addWidget(self._lvl_1_words)
-
-        self._lvl_2_words = StatisticsField("Words in learning lvl 2", font, height, self)
-        self._layout.addWidget(self._lvl_2_words)
+        self._fields: Dict[str, StatisticsField] = {}
+        for key, label in statistics_fields():
+            self._fields[key] = StatisticsField(label, font, height, self)
+            self._layout.addWidget(self._fields[key])
+
+        self._view = StatisticsView()
+        self._pending: Optional[Progress] = None
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.setInterval(self.frame_ms)
+        self._frame_timer.timeout.connect(self._apply_pending)
+
+    def set_progress(self, progress: Progress) -> None:
+        self._pending = progress
+        if not self._frame_timer.isActive():
+            self._frame_timer.start()
+
+    def _apply_pending(self) -> None:
+        if self._pending is None:
+            return
+        changes = self._view.changes(self._pending)
+        self._pending = None
+        for key, text in changes.items():
+            self._fields[key].setText(text)
+
+
+class InstrumentationBox(QWidget):
+    def __init__(self, font: QFont, parent: QWidget, max_methods: int = 8) -> None:
+        super().__init__(parent)
+        self._max_methods = max_methods
+        self._layout = QVBoxLayout(self)
+        self.setLayout(self._layout)
 
-        self._lvl_3_words = StatisticsField("Words in learning lvl 3", font, height, self)
-        self._layout.addWidget(self._lvl_3_words)
+        self._title = QLabel("Database calls", self)
+        self._title.setFont(font)
+        self._layout.addWidget(self._title)
+
+        mono_font = QFont(font)
+        mono_font.setFamily("Monospace")
+        mono_font.setStyleHint(QFont.TypeWriter)
+        self._table = QLabel("", self)
+        self._table.setFont(mono_font)
+        self._table.setAlignment(
+            Qt.Alignment(Qt.AlignmentFlag.AlignLeft) | Qt.AlignmentFlag.AlignTop
+        )
+        self._layout.addWidget(self._table)
+
+    def set_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        methods = sorted(
+            snapshot["methods"].items(),
+            key=lambda item: item[1]["total_ms"],
+            reverse=True,
+        )[: self._max_methods]
+        lines = [f"{'method':<22}{'calls':>7}{'p50us':>8}{'p99us':>8}{'rows':>8}{'commits':>8}"]
+        for name, stats in methods:
+            lines.append(
+                f"{name[:21]:<22}{stats['calls']:>7}{stats['p50_us']:>8.0f}"
+                f"{stats['p99_us']:>8.0f}{stats['rows']:>8}{stats['commits']:>8}"
+            )
+        lines.append(f"slow calls: {len(snapshot['slow_calls'])}")
+        self._table.setText("\n".join(lines))
+
+
+class SearchBox(QWidget):
+    def __init__(self, font: QFont, parent: QWidget) -> None:
+        super().__init__(parent)
+        self._layout = QVBoxLayout(self)
+        self.setLayout(self._layout)
 
-        self._lvl_4_words = StatisticsField("Words in learning lvl 4", font, height, self)
-        self._layout.addWidget(self._lvl_4_words)
+        self.query_field = QLineEdit(self)
+        self.query_field.setFont(font)
+        self.query_field.setPlaceholderText("Search the deck")
+        self._layout.addWidget(self.query_field)
 
-        self._lvl_5_words = StatisticsField("Words in learning lvl 5", font, height, self)
-        self._layout.addWidget(self._lvl_5_words)
+        self._results = QListWidget(self)
+        self._results.setFont(font)
+        self._layout.addWidget(self._results)
 
-    def set_words_in_db(self, words_in_db: int) -> None:
-        self._words_in_db.setText(str(words_in_db))
+        self._status = QLabel("", self)
+        self._status.setFont(font)
+        self._layout.addWidget(self._status)
 
-    def set_studied_words(self, studied_words: int) -> None:
-        self._studied_words.setText(str(studied_words))
+        self.more_button = QPushButton("More results", self)
+        self.more_button.setFont(font)
+        self.more_button.setEnabled(False)
+        self._layout.addWidget(self.more_button)
 
-    def set_current_word_lvl(self, current_word_lvl: int) -> None:        
-        self._current_word_lvl.setText(str(current_word_lvl))
-    
-    def set_words_in_lvl(self, words_in_lvl: List[int]) -> None:
-        self._lvl_0_words.setText(str(words_in_lvl[0]))
-        self._lvl_1_words.setText(str(words_in_lvl[1]))
-        self._lvl_2_words.setText(str(words_in_lvl[2]))
-        self._lvl_3_words.setText(str(words_in_lvl[3]))
-        self._lvl_4_words.setText(str(words_in_lvl[4]))
-        self._lvl_5_words.setText(str(words_in_lvl[5]))
\ No newline at end of file
+    def set_results(
+        self, rows: List[Tuple[Any, ...]], append: bool, has_more: bool, fuzzy: bool
+    ) -> None:
+        if not append:
+            self._results.clear()
+        for row in rows:
+            _, level, article, deutsch, plural, english = row[:6]
+            text = deutsch if article is None else f"{article} {deutsch}"
+            if plural is not None:
+                text += f" ({plural})"
+            self._results.addItem(f"{text} — {english} [{level}]")
+        count = self._results.count()
+        self._status.setText(
+            f"{count} similar words" if fuzzy else f"{count}{'+' if has_more else ''} words"
+        )
+        self.more_button.setEnabled(has_more)
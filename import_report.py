@@ -0,0 +1,28 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ImportReport:
+    rows: int
+    seconds: float
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    skipped: bool = False
+    rejected: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.seconds <= 0:
+            return float(self.rows)
+        return self.rows / self.seconds
+
+    def __str__(self) -> str:
+        if self.skipped:
+            return "source unchanged, import skipped"
+        return (
+            f"{self.rows} rows in {self.seconds:.3f} s "
+            f"({self.rows_per_second:.0f} rows/s): "
+            f"{self.inserted} inserted, {self.updated} updated, "
+            f"{self.deleted} deleted, {self.rejected} rejected"
+        )
@@ -0,0 +1,198 @@
+import csv
+import os
+import unicodedata
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import pandas as pd
+
+from answer_matcher import ARTICLES, is_missing
+
+PLURAL_ARTICLE = "die"
+_DASHES = "‐‑‒–—−"
+
+Row = Tuple[Any, ...]
+
+
+class RejectedRow(NamedTuple):
+    row: int
+    reason: str
+    values: Row
+
+
+def clean_text(value: Any) -> Optional[str]:
+    if not isinstance(value, str):
+        if is_missing(value):
+            return None
+        value = str(value)
+    if not value.isascii():
+        value = unicodedata.normalize("NFC", value)
+    return " ".join(value.split()) or None
+
+
+def parse_id(value: Any) -> Optional[int]:
+    if is_missing(value):
+        return None
+    text = str(value).strip()
+    try:
+        id = int(text)
+    except ValueError:
+        try:
+            number = float(text)
+        except ValueError:
+            return None
+        if not number.is_integer():
+            return None
+        id = int(number)
+    return id if 0 < id < 2**63 else None
+
+
+def parse_article(
+    article: Optional[str], deutsch: str
+) -> Tuple[Optional[str], str, Optional[str]]:
+    head, _, rest = deutsch.partition(" ")
+    if rest and head.lower() in ARTICLES:
+        if article is not None and article.lower() != head.lower():
+            return None, deutsch, f"article {article!r} does not match {deutsch!r}"
+        return head.lower(), rest, None
+    if article is None:
+        return None, deutsch, None
+    if article.lower() not in ARTICLES:
+        return None, deutsch, f"unknown article {article!r}"
+    return article.lower(), deutsch, None
+
+
+def parse_plural(plural: Optional[str]) -> Optional[str]:
+    if plural is None:
+        return None
+    if plural[0] in _DASHES:
+        plural = "-" + plural[1:]
+    head, _, rest = plural.partition(" ")
+    if rest and head.lower() == PLURAL_ARTICLE:
+        plural = rest
+    return plural
+
+
+def clean_row(values: Row) -> Tuple[Optional[Row], Optional[str]]:
+    id = parse_id(values[0])
+    if id is None:
+        return None, f"id {values[0]!r} is not a positive integer"
+    level, article, deutsch, plural, english, sample_phrase = map(clean_text, values[1:7])
+    if deutsch is None:
+        return None, "Deutsch is empty"
+    if english is None:
+        return None, "Englisch is empty"
+    article, deutsch, error = parse_article(article, deutsch)
+    if error is not None:
+        return None, error
+    if level is not None:
+        level = level.upper()
+    return (
+        id,
+        level,
+        article,
+        deutsch,
+        parse_plural(plural),
+        english,
+        sample_phrase,
+    ), None
+
+
+NumberedRows = List[Tuple[int, Row]]
+
+
+def clean_rows(numbered_rows: NumberedRows) -> Tuple[NumberedRows, List[RejectedRow]]:
+    rows: NumberedRows = []
+    rejected: List[RejectedRow] = []
+    for number, values in numbered_rows:
+        row, error = clean_row(values)
+        if row is None:
+            rejected.append(RejectedRow(number, error or "invalid row", values))
+        else:
+            rows.append((number, row))
+    return rows, rejected
+
+
+class IngestionPipeline:
+
+    def __init__(
+        self,
+        columns: List[str],
+        rejects_path: Optional[str] = None,
+        workers: int = 0,
+    ) -> None:
+        self.columns = columns
+        self.rejects_path = rejects_path
+        self.workers = workers
+        self.rows = 0
+        self.rejected = 0
+        self._seen: Set[int] = set()
+
+    def run(self, batches: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        self.rows = self.rejected = 0
+        self._seen.clear()
+        rejects = None
+        rejects_path = self.rejects_path
+        if rejects_path is not None:
+            rejects = open(rejects_path + ".part", "w", newline="", encoding="utf-8")
+            csv.writer(rejects).writerow(["row", "reason", *self.columns])
+        try:
+            empty = True
+            for rows, rejected in self._clean(batches):
+                rows = self._deduplicate(rows, rejected)
+                self.rows += len(rows) + len(rejected)
+                self.rejected += len(rejected)
+                if rejects is not None:
+                    csv.writer(rejects).writerows(
+                        (reject.row, reject.reason, *reject.values) for reject in rejected
+                    )
+                if rows or empty:
+                    empty = False
+                    yield pd.DataFrame(rows, columns=self.columns).astype({"id": "int64"})
+        except BaseException:
+            if rejects is not None and rejects_path is not None:
+                rejects.close()
+                os.remove(rejects_path + ".part")
+            raise
+        if rejects is not None and rejects_path is not None:
+            rejects.close()
+            os.replace(rejects_path + ".part", rejects_path)
+
+    def _deduplicate(
+        self, rows: NumberedRows, rejected: List[RejectedRow]
+    ) -> List[Row]:
+        unique = []
+        for number, row in rows:
+            if row[0] in self._seen:
+                rejected.append(RejectedRow(number, f"duplicate id {row[0]}", row))
+            else:
+                self._seen.add(row[0])
+                unique.append(row)
+        return unique
+
+    def _clean(
+        self, batches: Iterable[pd.DataFrame]
+    ) -> Iterator[Tuple[NumberedRows, List[RejectedRow]]]:
+        chunks = (
+            list(
+                zip(
+                    (index + 1 for index in batch.index.tolist()),
+                    zip(*(batch[column].tolist() for column in self.columns)),
+                )
+            )
+            for batch in batches
+        )
+        if self.workers <= 1:
+            yield from map(clean_rows, chunks)
+            return
+
+        with ProcessPoolExecutor(self.workers) as executor:
+            pending: Deque[Future] = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(clean_rows, chunk))
+                if len(pending) > self.workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
@@ -0,0 +1,184 @@
+import functools
+import inspect
+import json
+import time
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from databse_handler import DatabaseHandler
+
+HISTOGRAM_BUCKETS = 24
+
+
+@dataclass
+class MethodStats:
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    commits: int = 0
+    histogram: List[int] = field(default_factory=lambda: [0] * HISTOGRAM_BUCKETS)
+
+    def record(self, seconds: float, rows: int, commits: int) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.rows += rows
+        self.commits += commits
+        bucket = min(HISTOGRAM_BUCKETS - 1, max(0, int(seconds * 1e6)).bit_length())
+        self.histogram[bucket] += 1
+
+    def percentile(self, p: float) -> float:
+        threshold = self.calls * p / 100
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= threshold:
+                return min(self.max_seconds, (1 << bucket) / 1e6)
+        return self.max_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "total_ms": self.seconds * 1e3,
+            "mean_us": self.seconds / self.calls * 1e6 if self.calls else 0.0,
+            "p50_us": self.percentile(50) * 1e6,
+            "p95_us": self.percentile(95) * 1e6,
+            "p99_us": self.percentile(99) * 1e6,
+            "max_us": self.max_seconds * 1e6,
+            "rows": self.rows,
+            "commits": self.commits,
+            "histogram_us": {
+                f"<{1 << bucket}": count
+                for bucket, count in enumerate(self.histogram)
+                if count
+            },
+        }
+
+
+@dataclass
+class SlowCall:
+    method: str
+    seconds: float
+    statements: List[str]
+    plans: Dict[str, List[str]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "method": self.method,
+            "ms": self.seconds * 1e3,
+            "statements": self.statements,
+            "plans": self.plans,
+        }
+
+
+class Instrumentation:
+    _untraced_methods = {
+        "close",
+        "explain_query_plan",
+        "for_thread",
+        "set_trace_callback",
+        "total_changes",
+    }
+
+    def __init__(
+        self,
+        slow_seconds: float = 0.05,
+        explain_slow: bool = True,
+        max_statements: int = 50,
+        max_slow_calls: int = 100,
+    ) -> None:
+        self.slow_seconds = slow_seconds
+        self.explain_slow = explain_slow
+        self._max_statements = max_statements
+        self.methods: Dict[str, MethodStats] = {}
+        self.slow_calls: Deque[SlowCall] = deque(maxlen=max_slow_calls)
+        self._db: Optional[DatabaseHandler] = None
+        self._statements: List[str] = []
+        self._commits = 0
+        self._depth = 0
+
+    def attach(self, db: DatabaseHandler) -> DatabaseHandler:
+        self._db = db
+        for name, method in inspect.getmembers(db, inspect.ismethod):
+            if name.startswith("_") or name in self._untraced_methods:
+                continue
+            setattr(db, name, self._wrap(db, name, method))
+        db.set_trace_callback(self._trace)
+        return db
+
+    def detach(self) -> None:
+        if self._db is None:
+            return
+        for name in self.methods:
+            if name in vars(self._db):
+                delattr(self._db, name)
+        self._db.set_trace_callback(None)
+        self._db = None
+
+    def _trace(self, statement: str) -> None:
+        if statement.startswith("COMMIT"):
+            self._commits += 1
+        if self._depth and len(self._statements) < self._max_statements:
+            self._statements.append(statement)
+
+    def _wrap(
+        self, db: DatabaseHandler, name: str, method: Callable[..., Any]
+    ) -> Callable[..., Any]:
+        stats = self.methods.setdefault(name, MethodStats())
+
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            outermost = self._depth == 0
+            if outermost:
+                self._statements = []
+            self._depth += 1
+            commits = self._commits
+            changes = db.total_changes()
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                self._depth -= 1
+                stats.record(
+                    seconds,
+                    db.total_changes() - changes,
+                    self._commits - commits,
+                )
+                if outermost and seconds >= self.slow_seconds:
+                    self._record_slow_call(db, name, seconds)
+
+        return wrapper
+
+    def _record_slow_call(self, db: DatabaseHandler, name: str, seconds: float) -> None:
+        statements = [
+            statement
+            for statement in self._statements
+            if statement not in ("BEGIN", "BEGIN ", "COMMIT", "ROLLBACK")
+        ]
+        plans: Dict[str, List[str]] = {}
+        if self.explain_slow:
+            for statement in statements:
+                if statement in plans or not statement.lstrip().upper().startswith(
+                    ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+                ):
+                    continue
+                plans[statement] = db.explain_query_plan(statement)
+        self.slow_calls.append(SlowCall(name, seconds, statements, plans))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "methods": {
+                name: stats.to_dict()
+                for name, stats in sorted(self.methods.items())
+                if stats.calls
+            },
+            "slow_calls": [slow_call.to_dict() for slow_call in self.slow_calls],
+        }
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as output:
+            json.dump(self.snapshot(), output, indent=2)
@@ -1,117 +1,177 @@
-import os
+from typing import Any, List, Optional
+from PyQt5.QtCore import pyqtSignal, pyqtSlot, QObject, QTimer
+from config import Config
+from databse_handler import fuzzy_searchable
+from session import Session
 
-from dataclasses import dataclass
-from PyQt5.QtCore import pyqtSignal, pyqtSlot, QObject
-from csv_reader import CsvReader
-from databse_handler import DatabaseHandler
-from progress import Progress
-from word import MAX_LVL, Word
 
-
-@dataclass
-class Config:
-    spreadsheet_url: str
-    test_url: str
-    test_path: str
-    table_name: str
-    db_name: str
-
-
-class Worker(QObject):
-    _current_word: Word
+class Worker(Session, QObject):
     reset_to_default_started = pyqtSignal()
     reset_to_default_finished = pyqtSignal()
 
+    answer_submitted = pyqtSignal(str)
+    never_reask_requested = pyqtSignal(str)
+    words_number_changed = pyqtSignal(int)
+    progress_requested = pyqtSignal()
+    reset_progress_requested = pyqtSignal()
+    deck_selected = pyqtSignal(str)
+    mode_selected = pyqtSignal(str)
+    search_requested = pyqtSignal(str)
+    search_more_requested = pyqtSignal()
+
+    word_loaded = pyqtSignal(str, int)
+    nothing_to_review = pyqtSignal()
+    answer_checked = pyqtSignal(str, object, str)
+    progress_ready = pyqtSignal(object)
+    instrumentation_ready = pyqtSignal(object)
+    decks_ready = pyqtSignal(list, str)
+    mode_ready = pyqtSignal(str)
+    search_results_ready = pyqtSignal(list, bool, bool, bool)
+
     def __init__(self, config: Config) -> None:
-        super().__init__()
-        self._config = config
+        QObject.__init__(self)
+        Session.__init__(self, config)
 
         # if os.path.exists(config.db_name):
         #     os.remove(config.db_name)
 
-        self._db = DatabaseHandler(config.db_name)
+        self._flush_timer: Optional[QTimer] = None
+        self.search_page_size = 20
+        self._search_query = ""
+        self._search_after = 0
+        self._search_fuzzy = False
 
-        self.words_number = 20
+        self.reset_to_default_started.connect(self.reset_to_default)
+        self.answer_submitted.connect(self.submit_answer)
+        self.never_reask_requested.connect(self.on_never_reask)
+        self.words_number_changed.connect(self.set_words_number)
+        self.progress_requested.connect(self.send_progress)
+        self.reset_progress_requested.connect(self.send_reset_progress)
+        self.deck_selected.connect(self.on_select_deck)
+        self.mode_selected.connect(self.on_select_mode)
+        self.search_requested.connect(self.run_search)
+        self.search_more_requested.connect(self.search_more)
 
-        if not self._db.table_exists(config.table_name):
-            self.reset_to_default()
-        elif self._db.get_random_row(self._config.table_name, 1) is None:
+    @pyqtSlot()
+    def start(self) -> None:
+        self.open()
+        self.decks_ready.emit(self.deck_names(), self.deck_name)
+        self.mode_ready.emit(self.mode)
+        self._open_deck()
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.timeout.connect(self._flush_if_due)
+        self._flush_timer.start(int(self._config.write_behind_seconds * 1000))
+
+    def _open_deck(self) -> None:
+        if self.needs_import():
             self.reset_to_default()
+        else:
+            self._send_next_word()
+
+    @pyqtSlot(str)
+    def on_select_deck(self, deck_name: str) -> None:
+        if self.select_deck(deck_name):
+            self.mode_ready.emit(self.mode)
+            self._open_deck()
+
+    @pyqtSlot(str)
+    def on_select_mode(self, mode: str) -> None:
+        if self.select_mode(mode):
+            self._open_deck()
+        else:
+            self.mode_ready.emit(self.mode)
+            current_word = getattr(self, "_current_word", None)
+            if current_word is None:
+                self.nothing_to_review.emit()
+            else:
+                self.word_loaded.emit(
+                    current_word.english, self.get_current_learned_lvl()
+                )
+
+    def _send_next_word(self) -> None:
+        new_word = self.load_new_word()
+        if new_word is None:
+            self.nothing_to_review.emit()
+        else:
+            self.word_loaded.emit(new_word, self.get_current_learned_lvl())
+        self.progress_ready.emit(self.get_progress())
+        self.refill_prefetch_buffer()
+        self._send_instrumentation()
 
-        self.reset_to_default_started.connect(self.reset_to_default)
-
-    def load_new_word(self) -> str:
-        random_word = self._db.get_random_row(
-            self._config.table_name, self.words_number
-        )
-        self._current_word = Word.from_tuple(random_word)
-        return self._current_word.english
+    def _send_instrumentation(self) -> None:
+        snapshot = self.instrumentation_snapshot()
+        if snapshot is not None:
+            self.instrumentation_ready.emit(snapshot)
 
     @pyqtSlot()
-    def reset_to_default(self) -> None:
-        reader = CsvReader()
-        data = reader.read_from_file(self._config.spreadsheet_url)
-        db = DatabaseHandler(self._config.db_name)
-        db.initialize_db_by_df(self._config.table_name, data)
-        db.insert_df_into_db(self._config.table_name, data)
-        self.reset_to_default_finished.emit()
+    def _flush_if_due(self) -> None:
+        self.flush_if_due()
+
+    @pyqtSlot(str)
+    def submit_answer(self, input_text: str) -> None:
+        result = self.submit(input_text)
+        self.answer_checked.emit(input_text, result, self.get_translated_word())
+        self._send_next_word()
+
+    @pyqtSlot(str)
+    def on_never_reask(self, input_text: str) -> None:
+        result = self.never_reask_if_correct(input_text)
+        self.answer_checked.emit(input_text, result, self.get_translated_word())
+        self._send_next_word()
+
+    @pyqtSlot(str)
+    def run_search(self, query: str) -> None:
+        self._search_query = query
+        self._search_after = 0
+        self._search_fuzzy = False
+        rows = self._search_page()
+        if not rows and fuzzy_searchable(query):
+            self._search_fuzzy = True
+            rows = self._search_page()
+        self._send_search_results(rows, False)
 
-    def reset_progress(self) -> None:
-        self._db.reset_progress(self._config.table_name)
-        self.get_progress()
-
-    def update_progress_in_db(self, result: bool) -> None:
-        self._db.update_progress(
-            self._config.table_name, int(self._current_word.id), result, result
-        )
-        self._db.update_learning_lvl(
-            self._config.table_name, self._current_word, result
+    @pyqtSlot()
+    def search_more(self) -> None:
+        self._send_search_results(self._search_page(), True)
+
+    def _search_page(self) -> List[Any]:
+        return self.search(
+            self._search_query,
+            self._search_after,
+            self.search_page_size,
+            self._search_fuzzy,
         )
 
-    def get_translated_word(self) -> str:
-        if self._current_word.article is not None:
-            translated_word = (
-                self._current_word.article + " " + self._current_word.deutsch
-            )
-        else:
-            translated_word = self._current_word.deutsch
-        return translated_word
+    def _send_search_results(self, rows: List[Any], append: bool) -> None:
+        if rows:
+            self._search_after = rows[-1][0]
+        has_more = len(rows) == self.search_page_size
+        self.search_results_ready.emit(rows, append, has_more, self._search_fuzzy)
 
-    def set_words_number(self, words_number: int) -> None:
-        self.words_number = words_number
+    @pyqtSlot()
+    def send_progress(self) -> None:
+        self.progress_ready.emit(self.get_progress())
+        self._send_instrumentation()
 
-    def never_reask(self) -> None:
-        self._db.set_learned_lvl(
-            self._config.table_name,
-            int(self._current_word.id),
-            MAX_LVL,
-        )
+    @pyqtSlot()
+    def send_reset_progress(self) -> None:
+        self.reset_progress()
+        self.progress_ready.emit(self.get_progress())
+        self.refill_prefetch_buffer()
 
-    def get_current_learned_lvl(self) -> int:
-        return int(self._current_word.learned_lvl)
+    @pyqtSlot()
+    def reset_to_default(self) -> None:
+        self.reload_deck()
+        self.reset_to_default_finished.emit()
+        self._send_next_word()
 
-    def check_answer(self, input_text: str) -> bool:
-        if self._current_word.article is not None:
-            correct_answer = (
-                self._current_word.article + " " + self._current_word.deutsch
-            )
-        else:
-            correct_answer = self._current_word.deutsch
-        if input_text.lower() == correct_answer.lower():
-            return True
-        else:
-            return False
-
-    def get_progress(self) -> Progress:
-        words_in_db = self._db.get_number_of_rows_in_table(self._config.table_name)
-        studied_words = self._db.get_number_of_studied_words(self._config.table_name)
-        current_word_lvl = int(self._current_word.learned_lvl)
-        words_in_lvl = []
-        for i in range(MAX_LVL + 1):
-            words_in_lvl.append(
-                self._db.get_number_of_words_in_lvl(self._config.table_name, i)
-            )
-        return Progress(words_in_db, studied_words, current_word_lvl, words_in_lvl)
+    @pyqtSlot(int)
+    def set_words_number(self, words_number: int) -> None:
+        super().set_words_number(words_number)
 
+    @pyqtSlot()
     def cleanup(self) -> None:
-        self._db.close()
+        if self._flush_timer is not None:
+            self._flush_timer.stop()
+        self.close()
@@ -1,6 +1,8 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List
 
+from answer_stats import DayStats
+
 
 @dataclass
 class Progress:
@@ -8,3 +10,4 @@ class Progress:
     studied_words: int
     current_word_lvl: int
     words_in_lvl: List[int]
+    days: List[DayStats] = field(default_factory=list)
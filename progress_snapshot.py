@@ -0,0 +1,87 @@
+import struct
+import zlib
+
+from typing import Any, Iterable, Iterator, List, NamedTuple, Sequence, Tuple
+
+MAGIC = b"LVPS"
+VERSION = 2
+SNAPSHOT_COLUMNS = (
+    "id",
+    "learned_lvl",
+    "correct_translations",
+    "correct_articles",
+    "incorrect_translations",
+    "incorrect_articles",
+    "due_at",
+    "interval",
+    "ease",
+    "repetitions",
+)
+SNAPSHOT_TYPECODES = ("q", "i", "i", "i", "i", "i", "d", "d", "d", "i")
+SNAPSHOT_SCHEMA = (
+    "id INTEGER PRIMARY KEY, learned_lvl INTEGER NOT NULL, "
+    "correct_translations INTEGER NOT NULL, correct_articles INTEGER NOT NULL, "
+    "incorrect_translations INTEGER NOT NULL, incorrect_articles INTEGER NOT NULL, "
+    "due_at REAL, interval REAL NOT NULL, ease REAL, repetitions INTEGER NOT NULL"
+)
+_HEADER = struct.Struct("<4sHHI")
+_SECTION = struct.Struct("<cI")
+_DTYPES = {"q": "<i8", "i": "<i4", "d": "<f8"}
+
+
+class SnapshotHeader(NamedTuple):
+    version: int
+    max_lvl: int
+    words: int
+
+
+def pack(
+    chunks: Iterable[Sequence[Sequence[Any]]], max_lvl: int, level: int = 1
+) -> bytes:
+    import numpy as np
+
+    parts = [np.array(chunk, dtype=np.float64) for chunk in chunks if chunk]
+    table = (
+        np.concatenate(parts) if parts else np.empty((0, len(SNAPSHOT_COLUMNS)))
+    )
+    body = bytearray()
+    for index, typecode in enumerate(SNAPSHOT_TYPECODES):
+        column = table[:, index].astype(_DTYPES[typecode])
+        body += _SECTION.pack(typecode.encode(), len(column)) + column.tobytes()
+    header = _HEADER.pack(MAGIC, VERSION, max_lvl, len(table))
+    return header + zlib.compress(body, level)
+
+
+def unpack(data: bytes) -> Tuple[SnapshotHeader, Iterator[Tuple[Any, ...]]]:
+    import numpy as np
+
+    if len(data) < _HEADER.size:
+        raise ValueError("not a progress snapshot")
+    magic, version, max_lvl, words = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a progress snapshot")
+    if version != VERSION:
+        raise ValueError(f"unsupported progress snapshot version {version}")
+    size = sum(
+        _SECTION.size + words * np.dtype(_DTYPES[typecode]).itemsize
+        for typecode in SNAPSHOT_TYPECODES
+    )
+    decompressor = zlib.decompressobj()
+    try:
+        body = decompressor.decompress(memoryview(data)[_HEADER.size :], size + 1)
+    except zlib.error as error:
+        raise ValueError(f"corrupt progress snapshot: {error}") from error
+    if len(body) != size or not decompressor.eof or decompressor.unused_data:
+        raise ValueError("corrupt progress snapshot: unexpected length")
+
+    columns: List[List[Any]] = []
+    offset = 0
+    for name, typecode in zip(SNAPSHOT_COLUMNS, SNAPSHOT_TYPECODES):
+        code, count = _SECTION.unpack_from(body, offset)
+        offset += _SECTION.size
+        if code != typecode.encode() or count != words:
+            raise ValueError(f"corrupt progress snapshot: bad {name} column")
+        column = np.frombuffer(body, _DTYPES[typecode], count, offset)
+        offset += column.nbytes
+        columns.append(column.tolist())
+    return SnapshotHeader(version, max_lvl, words), zip(*columns)
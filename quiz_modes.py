@@ -0,0 +1,111 @@
+import re
+
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Optional, Tuple
+
+from answer_matcher import expand_plural, is_missing, split_article
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_MODE = "en_de"
+QUIZ_MODES = {
+    "en_de": "English → German",
+    "de_en": "German → English",
+    "article": "Article",
+    "plural": "Plural",
+    "cloze": "Example sentence",
+}
+BLANK = "___"
+PLURAL_ARTICLE = "die"
+
+Row = Tuple[Any, ...]
+
+
+def mode_table(deck: str, mode: str) -> str:
+    if mode not in QUIZ_MODES:
+        raise ValueError(f"unknown quiz mode: {mode}")
+    return deck if mode == DEFAULT_MODE else f"{deck}_{mode}"
+
+
+def _with_article(article: Optional[str], word: str) -> str:
+    return word if is_missing(article) else f"{article} {word}"
+
+
+def _is_word_char(text: str, index: int) -> bool:
+    return 0 <= index < len(text) and (text[index].isalnum() or text[index] == "_")
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    return _is_word_char(text, index - 1) != _is_word_char(text, index)
+
+
+def _blank(sentence: str, word: str) -> Optional[str]:
+    lowered, target = sentence.lower(), word.lower()
+    if not target or len(lowered) != len(sentence):
+        return _blank_pattern(sentence, word)
+    start = lowered.find(target)
+    while start != -1:
+        end = start + len(target)
+        if _is_boundary(sentence, start) and _is_boundary(sentence, end):
+            return sentence[:start] + BLANK + sentence[end:]
+        start = lowered.find(target, start + 1)
+    return None
+
+
+def _blank_pattern(sentence: str, word: str) -> Optional[str]:
+    match = re.search(rf"\b{re.escape(word)}\b", sentence, re.IGNORECASE)
+    if match is None:
+        return None
+    return sentence[: match.start()] + BLANK + sentence[match.end() :]
+
+
+def quiz_row(mode: str, row: Row) -> Optional[Row]:
+    id, level, article, deutsch, plural, english, sample_phrase = row[:7]
+    if mode == DEFAULT_MODE:
+        return row[:7]
+    if mode == "de_en":
+        prompt = _with_article(article, deutsch)
+        return id, level, None, english, None, prompt, sample_phrase
+    if mode == "article":
+        if is_missing(article):
+            return None
+        return id, level, None, article, None, f"{BLANK} {deutsch}", sample_phrase
+    if mode == "plural":
+        plural = expand_plural(deutsch, plural)
+        if plural is None:
+            return None
+        _, plural = split_article(plural)
+        prompt = f"{_with_article(article, deutsch)} (Plural)"
+        return id, level, PLURAL_ARTICLE, plural, None, prompt, sample_phrase
+    if mode == "cloze":
+        if is_missing(sample_phrase):
+            return None
+        plural = expand_plural(deutsch, plural)
+        for answer in (deutsch, plural and split_article(plural)[1]):
+            if answer:
+                cloze = _blank(sample_phrase, answer)
+                if cloze is not None:
+                    prompt = f"{cloze} ({english})"
+                    return id, level, None, answer, None, prompt, sample_phrase
+        return None
+    raise ValueError(f"unknown quiz mode: {mode}")
+
+
+def quiz_batches(
+    mode: str, rows: Iterable[Row], columns: List[str], batch_size: int = 10000
+) -> Iterator["pd.DataFrame"]:
+    import pandas as pd
+
+    batch: List[Row] = []
+    empty = True
+    for row in rows:
+        derived = quiz_row(mode, row)
+        if derived is None:
+            continue
+        batch.append(derived)
+        if len(batch) == batch_size:
+            yield pd.DataFrame(batch, columns=columns)
+            batch = []
+            empty = False
+    if batch or empty:
+        yield pd.DataFrame(batch, columns=columns)
@@ -0,0 +1,48 @@
+from dataclasses import dataclass
+from typing import Optional
+
+DAY = 24 * 60 * 60
+RELEARN_DELAY = 60.0
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+RETIRE_INTERVAL = 180
+
+
+@dataclass
+class Schedule:
+    due_at: float
+    interval: float
+    ease: float
+    repetitions: int
+
+
+def answer_quality(correct_translation: bool, correct_article: bool) -> int:
+    if correct_translation:
+        return 5 if correct_article else 3
+    return 1 if correct_article else 0
+
+
+def sm2(
+    interval: float,
+    ease: Optional[float],
+    repetitions: int,
+    quality: int,
+    now: float,
+) -> Schedule:
+    ease = DEFAULT_EASE if ease is None else ease
+    if quality >= 3:
+        if repetitions == 0:
+            interval = 1
+        elif repetitions == 1:
+            interval = 6
+        else:
+            interval = max(1, round(interval * ease))
+        repetitions += 1
+        due_at = now + interval * DAY
+    else:
+        interval = 0
+        repetitions = 0
+        due_at = now + RELEARN_DELAY
+
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return Schedule(due_at, interval, ease, repetitions)
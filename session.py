@@ -0,0 +1,474 @@
+import os
+import time
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from answer_event import AnswerEvent
+from answer_journal import AnswerJournal
+from answer_matcher import AnswerKey, Grade, answer_key, grade
+from answer_stats import DayStats, today
+from config import Config
+from databse_handler import DatabaseHandler
+from deck_registry import DeckRegistry
+from import_report import ImportReport
+from instrumentation import Instrumentation
+from progress import Progress
+from quiz_modes import DEFAULT_MODE, QUIZ_MODES, mode_table, quiz_batches
+from source_cache import SourceCache
+from user_database_handler import UserDatabaseHandler
+from word import MAX_LVL, Word
+from word_store import WordStore
+
+
+class Session:
+    _current_word: Word
+    _db: DatabaseHandler
+    _journal: AnswerJournal
+    _decks: DeckRegistry
+    last_import_report: Optional[ImportReport] = None
+
+    def __init__(self, config: Config) -> None:
+        self._config = config
+
+        self.deck_name = config.table_name
+        self.mode = config.quiz_mode
+        self.table_name = mode_table(self.deck_name, self.mode)
+        self.words_number = 20
+        self.prefetch_size = 10
+        self.trend_days = 14
+
+        self._prefetched: Deque[Word] = deque()
+        self._answered: Dict[int, Word] = {}
+        self._instrumentation: Optional[Instrumentation] = None
+        self._store: Optional[WordStore] = None
+        self._shown_at = time.monotonic()
+        self._source_cache = SourceCache(config.cache_dir)
+
+    def open(self) -> None:
+        if self._config.user is None:
+            self._db = DatabaseHandler.for_thread(
+                self._config.db_name,
+                wal=self._config.wal_mode,
+                busy_timeout=self._config.busy_timeout,
+            )
+        else:
+            self._db = UserDatabaseHandler.for_thread(
+                self._config.db_name,
+                self._config.user,
+                busy_timeout=self._config.busy_timeout,
+            )
+        if self._config.instrumentation_path:
+            self._instrumentation = Instrumentation(self._config.slow_query_ms / 1000)
+            self._instrumentation.attach(self._db)
+        self._journal = AnswerJournal(
+            self._db,
+            self.table_name,
+            self._config.write_behind_answers,
+            self._config.write_behind_seconds,
+        )
+        self._decks = DeckRegistry(
+            self._db,
+            {self._config.table_name: self._config.spreadsheet_url, **self._config.decks},
+        )
+        if not self._has_mode(self.deck_name, self.mode):
+            self.mode = DEFAULT_MODE
+            self.table_name = self._journal.table_name = self.deck_name
+        self._load_store()
+        self._restore_prefetch()
+
+    def deck_names(self) -> List[str]:
+        return self._decks.names()
+
+    def needs_import(self) -> bool:
+        return not self._db.has_words(self.deck_name)
+
+    def select_deck(self, deck_name: str) -> bool:
+        if deck_name == self.deck_name or deck_name not in self._decks:
+            return False
+        mode = self.mode if self._has_mode(deck_name, self.mode) else DEFAULT_MODE
+        self._switch_table(deck_name, mode)
+        return True
+
+    def select_mode(self, mode: str) -> bool:
+        if mode == self.mode or not self._has_mode(self.deck_name, mode):
+            return False
+        self._switch_table(self.deck_name, mode)
+        return True
+
+    def _has_mode(self, deck_name: str, mode: str) -> bool:
+        if mode not in QUIZ_MODES:
+            return False
+        table_name = mode_table(deck_name, mode)
+        if table_name == deck_name or not self._db.has_words(deck_name):
+            return True
+        return self._db.has_words(table_name)
+
+    def _switch_table(self, deck_name: str, mode: str) -> None:
+        self._save_prefetch()
+        self._invalidate_prefetch()
+        self.deck_name = deck_name
+        self.mode = mode
+        self.table_name = mode_table(deck_name, mode)
+        self._journal.table_name = self.table_name
+        self._load_store()
+        self._restore_prefetch()
+
+    def _build_mode_tables(self, missing_only: bool = False) -> None:
+        from csv_reader import CsvReader
+
+        for mode in QUIZ_MODES:
+            table_name = mode_table(self.deck_name, mode)
+            if table_name == self.deck_name:
+                continue
+            if missing_only and self._db.table_exists(table_name):
+                continue
+            self._db.sync_batches_into_db(
+                table_name,
+                quiz_batches(
+                    mode, self._db.iter_rows(self.deck_name), CsvReader._required_columns
+                ),
+                delete_missing=True,
+                fast_pragmas=self._config.fast_import_pragmas,
+            )
+
+    def reload_deck(self) -> ImportReport:
+        deck = self._decks.get(self.deck_name)
+        source = self._source_cache.fetch(deck.source)
+        if (
+            deck.content_hash == source.content_hash
+            and self._db.table_exists(self.deck_name)
+        ):
+            self.last_import_report = ImportReport(0, 0.0, skipped=True)
+            self._build_mode_tables(missing_only=True)
+        else:
+            from csv_reader import CsvReader
+            from ingestion import IngestionPipeline
+
+            reader = CsvReader()
+            pipeline = IngestionPipeline(
+                CsvReader._required_columns,
+                self._config.rejects_path,
+                self._config.ingest_workers,
+            )
+            batches = pipeline.run(reader.read_raw_batches(source.path))
+            self._journal.flush()
+            self.last_import_report = self._db.sync_batches_into_db(
+                self.deck_name,
+                batches,
+                delete_missing=self._config.sync_delete_missing,
+                fast_pragmas=self._config.fast_import_pragmas,
+            )
+            self.last_import_report.rows = pipeline.rows
+            self.last_import_report.rejected = pipeline.rejected
+            self._db.create_search_index(self.deck_name)
+            self._build_mode_tables()
+            self._decks.mark_imported(self.deck_name, source.content_hash)
+            self._load_store()
+        self._invalidate_prefetch()
+        if not self._has_mode(self.deck_name, self.mode):
+            self._switch_table(self.deck_name, DEFAULT_MODE)
+        return self.last_import_report
+
+    def _load_store(self) -> None:
+        if self._config.memory_cache:
+            self._store = WordStore.from_rows(self._db.iter_rows(self.table_name))
+
+    def _get_word(self, id: int) -> Optional[Word]:
+        if self._store is not None:
+            return self._store.get(id)
+        row = self._db.get_row(self.table_name, id)
+        return None if row is None else Word.from_tuple(row)
+
+    def load_word(self, id: int) -> str:
+        word = self._get_word(id)
+        if word is None:
+            raise KeyError(id)
+        self._current_word = self._answered.get(word.id, word)
+        self._shown_at = time.monotonic()
+        return self._current_word.english
+
+    def load_new_word(self) -> Optional[str]:
+        word = self._take_prefetched_word(time.time())
+        if word is None:
+            self._journal.flush()
+            words = self._fetch_words(1)
+            if not words:
+                vars(self).pop("_current_word", None)
+                return None
+            word = words[0]
+
+        self._current_word = word
+        self._shown_at = time.monotonic()
+        return self._current_word.english
+
+    def _take_prefetched_word(self, now: float) -> Optional[Word]:
+        while self._prefetched:
+            word = self._prefetched.popleft()
+            if word.id not in self._answered:
+                return word
+            word = self._answered[word.id]
+            if self._config.scheduler != "sm2" or word.is_due(now):
+                return word
+        return None
+
+    def _fetch_words(self, limit: int) -> List[Word]:
+        if self._config.scheduler == "sm2":
+            rows = self._db.get_due_rows(
+                self.table_name, limit, self.words_number, time.time()
+            )
+        else:
+            rows = [
+                self._db.get_random_row(self.table_name, self.words_number)
+                for _ in range(limit)
+            ]
+        return [Word.from_tuple(row) for row in rows if row is not None]
+
+    def refill_prefetch_buffer(self) -> None:
+        if self._config.scheduler == "sm2":
+            if not self._prefetched:
+                self._prefetched.extend(
+                    word
+                    for word in self._fetch_words(self.prefetch_size)
+                    if word.id != self._current_word.id
+                )
+            return
+
+        missing = self.prefetch_size - len(self._prefetched)
+        if missing > 0:
+            self._prefetched.extend(self._fetch_words(missing))
+
+    def _save_prefetch(self) -> None:
+        words = list(self._prefetched)
+        current_word = getattr(self, "_current_word", None)
+        if current_word is not None:
+            words.insert(0, current_word)
+        self._db.set_prefetch_cache(self.table_name, (word.id for word in words))
+
+    def _restore_prefetch(self) -> None:
+        for id in self._db.get_prefetch_cache(self.table_name):
+            word = self._get_word(id)
+            if word is not None and word.learned_lvl < MAX_LVL:
+                self._prefetched.append(word)
+
+    def _invalidate_prefetch(self) -> None:
+        self._journal.flush()
+        self._prefetched.clear()
+        self._answered.clear()
+
+    def reset_progress(
+        self, level: Optional[str] = None, ids: Optional[List[int]] = None
+    ) -> int:
+        self._journal.flush()
+        changed = self._db.reset_progress(self.table_name, level, ids)
+        self._after_bulk_update()
+        return changed
+
+    def recompute_levels(self, previous_max_lvl: Optional[int] = None) -> int:
+        self._journal.flush()
+        changed = self._db.recompute_levels(self.table_name, MAX_LVL, previous_max_lvl)
+        self._after_bulk_update()
+        return changed
+
+    def shift_levels(
+        self,
+        delta: int,
+        level: Optional[str] = None,
+        ids: Optional[List[int]] = None,
+        learned_lvl: Optional[int] = None,
+    ) -> int:
+        self._journal.flush()
+        changed = self._db.shift_levels(
+            self.table_name, delta, level, ids, learned_lvl, time.time()
+        )
+        self._after_bulk_update()
+        return changed
+
+    def _after_bulk_update(self) -> None:
+        self._invalidate_prefetch()
+        self._load_store()
+        current_word = getattr(self, "_current_word", None)
+        if current_word is not None:
+            word = self._get_word(current_word.id)
+            if word is not None:
+                self._current_word = word
+
+    def export_progress(self, path: str) -> int:
+        self._journal.flush()
+        data = self._db.export_progress(self.table_name)
+        partial_path = path + ".part"
+        with open(partial_path, "wb") as output:
+            output.write(data)
+        os.replace(partial_path, path)
+        return len(data)
+
+    def import_progress(self, path: str, prefer: str = "snapshot") -> int:
+        with open(path, "rb") as snapshot:
+            data = snapshot.read()
+        self._journal.flush()
+        changed = self._db.import_progress(self.table_name, data, prefer)
+        self._after_bulk_update()
+        return changed
+
+    def update_progress_in_db(
+        self,
+        correct_translation: bool,
+        correct_article: Optional[bool] = None,
+        now: Optional[float] = None,
+        response_ms: Optional[int] = None,
+    ) -> None:
+        if correct_article is None:
+            correct_article = correct_translation
+        if now is None:
+            now = time.time()
+        old_lvl = self._current_word.learned_lvl
+        self._current_word = self._current_word.answered(
+            correct_translation, correct_article, now
+        )
+        lvl = self._current_word.learned_lvl
+        self._journal.add(
+            AnswerEvent(
+                self._current_word.id,
+                correct_translation,
+                correct_article,
+                old_lvl,
+                lvl,
+                self._current_word.due_at,
+                self._current_word.interval,
+                self._current_word.ease,
+                self._current_word.repetitions,
+                now,
+                response_ms,
+            )
+        )
+        if self._store is not None:
+            self._store.update(self._current_word)
+        if lvl >= MAX_LVL:
+            self._invalidate_prefetch()
+        else:
+            self._answered[self._current_word.id] = self._current_word
+
+    def get_translated_word(self) -> str:
+        if self._current_word.article is not None:
+            translated_word = (
+                self._current_word.article + " " + self._current_word.deutsch
+            )
+        else:
+            translated_word = self._current_word.deutsch
+        return translated_word
+
+    def set_words_number(self, words_number: int) -> None:
+        if words_number != self.words_number:
+            self.words_number = words_number
+            self._invalidate_prefetch()
+
+    def never_reask(self) -> None:
+        self._journal.flush()
+        self._db.set_learned_lvl(
+            self.table_name,
+            self._current_word.id,
+            MAX_LVL,
+        )
+        if self._store is not None:
+            self._store.update(self._current_word._replace(learned_lvl=MAX_LVL))
+        self._invalidate_prefetch()
+
+    def get_current_word_id(self) -> int:
+        return self._current_word.id
+
+    def get_current_learned_lvl(self) -> int:
+        return self._current_word.learned_lvl
+
+    def _answer_key(self) -> AnswerKey:
+        word = self._current_word
+        key = self._db.get_answer_key(self.table_name, word.id)
+        if key is None:
+            key = answer_key(word.article, word.deutsch, word.plural)
+        return key
+
+    def grade_answer(self, input_text: str) -> Grade:
+        return grade(self._answer_key(), input_text)
+
+    def check_answer(self, input_text: str) -> bool:
+        return self.grade_answer(input_text).correct
+
+    def get_progress(self) -> Progress:
+        histogram = self._db.get_level_histogram(self.table_name)
+        for lvl, delta in self._journal.pending_level_deltas().items():
+            histogram[lvl] = histogram.get(lvl, 0) + delta
+        words_in_db = sum(histogram.values())
+        studied_words = sum(words for lvl, words in histogram.items() if lvl > -1)
+        current_word = getattr(self, "_current_word", None)
+        current_word_lvl = -1 if current_word is None else current_word.learned_lvl
+        words_in_lvl = [histogram.get(i, 0) for i in range(MAX_LVL + 1)]
+        return Progress(
+            words_in_db, studied_words, current_word_lvl, words_in_lvl, self.get_days()
+        )
+
+    def get_days(self) -> List[DayStats]:
+        days = {
+            stats.day: stats
+            for stats in self._db.get_answer_days(
+                self.table_name, today() - self.trend_days + 1
+            )
+        }
+        for day, stats in self._journal.pending_days().items():
+            days[day] = days[day].merged(stats) if day in days else stats
+        return [days[day] for day in sorted(days)]
+
+    def hardest_words(
+        self, days: int = 7, limit: int = 10
+    ) -> List[Tuple[Word, int, int]]:
+        self._journal.flush()
+        since = time.time() - days * 86400
+        result = []
+        for id, answers, mistakes in self._db.get_hardest_words(
+            self.table_name, since, limit
+        ):
+            word = self._get_word(id)
+            if word is not None:
+                result.append((word, answers, mistakes))
+        return result
+
+    def submit(
+        self,
+        input_text: str,
+        now: Optional[float] = None,
+        response_ms: Optional[int] = None,
+    ) -> Grade:
+        if response_ms is None:
+            response_ms = round((time.monotonic() - self._shown_at) * 1000)
+        result = self.grade_answer(input_text)
+        self.update_progress_in_db(
+            result.correct_translation, result.correct_article, now, response_ms
+        )
+        return result
+
+    def never_reask_if_correct(self, input_text: str) -> Grade:
+        result = self.grade_answer(input_text)
+        if result.correct:
+            self.never_reask()
+        return result
+
+    def search(
+        self, query: str, after_id: int = 0, limit: int = 20, fuzzy: bool = False
+    ) -> List[Any]:
+        return self._db.search(self.deck_name, query, after_id, limit, fuzzy)
+
+    def flush_if_due(self) -> None:
+        if self._journal.is_due():
+            self._journal.flush()
+
+    def instrumentation_snapshot(self) -> Optional[Dict[str, Any]]:
+        if self._instrumentation is None:
+            return None
+        return self._instrumentation.snapshot()
+
+    def close(self) -> None:
+        self._journal.flush()
+        self._save_prefetch()
+        if self._instrumentation is not None:
+            if self._config.instrumentation_path:
+                self._instrumentation.dump(self._config.instrumentation_path)
+            self._instrumentation.detach()
+        self._db.close()
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+
+from dataclasses import dataclass
+from typing import IO, Dict, Optional
+
+
+@dataclass
+class CachedSource:
+    path: str
+    content_hash: str
+    downloaded: bool
+    offline: bool = False
+
+
+class SourceCache:
+
+    def __init__(self, cache_dir: str, timeout: float = 10.0) -> None:
+        self._cache_dir = cache_dir
+        self._timeout = timeout
+
+    def fetch(self, source: str) -> CachedSource:
+        if not source.startswith(("http://", "https://")):
+            return CachedSource(source, self._hash_file(source), downloaded=False)
+
+        import urllib.error
+        import urllib.request
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+        key = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+        path = os.path.join(self._cache_dir, f"{key}.csv")
+        meta_path = os.path.join(self._cache_dir, f"{key}.json")
+        meta = self._read_meta(meta_path) if os.path.exists(path) else {}
+        cached_hash = meta.get("content_hash")
+
+        request = urllib.request.Request(source)
+        etag, last_modified = meta.get("etag"), meta.get("last_modified")
+        if cached_hash and etag:
+            request.add_header("If-None-Match", etag)
+        if cached_hash and last_modified:
+            request.add_header("If-Modified-Since", last_modified)
+
+        try:
+            with urllib.request.urlopen(request, timeout=self._timeout) as response:
+                content_hash = self._download(response, path)
+                meta = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "content_hash": content_hash,
+                }
+        except urllib.error.HTTPError as error:
+            if not cached_hash:
+                raise
+            return CachedSource(
+                path, cached_hash, downloaded=False, offline=error.code != 304
+            )
+        except (urllib.error.URLError, OSError):
+            if not cached_hash:
+                raise
+            return CachedSource(path, cached_hash, downloaded=False, offline=True)
+
+        with open(meta_path, "w", encoding="utf-8") as meta_file:
+            json.dump(meta, meta_file)
+        return CachedSource(path, content_hash, downloaded=True)
+
+    def _download(self, response: IO[bytes], path: str) -> str:
+        digest = hashlib.sha256()
+        partial_path = path + ".part"
+        with open(partial_path, "wb") as cache_file:
+            for chunk in iter(lambda: response.read(1 << 16), b""):
+                digest.update(chunk)
+                cache_file.write(chunk)
+        os.replace(partial_path, path)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as source_file:
+            for chunk in iter(lambda: source_file.read(1 << 16), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _read_meta(meta_path: str) -> Dict[str, Optional[str]]:
+        try:
+            with open(meta_path, encoding="utf-8") as meta_file:
+                return json.load(meta_file)
+        except (OSError, ValueError):
+            return {}
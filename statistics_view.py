@@ -0,0 +1,66 @@
+from typing import Dict, List, Optional, Tuple
+
+from answer_stats import today, total
+from progress import Progress
+from word import MAX_LVL
+
+
+def statistics_fields(max_lvl: int = MAX_LVL) -> List[Tuple[str, str]]:
+    return [
+        ("words_in_db", "Words in the db"),
+        ("studied_words", "Studied words"),
+        ("current_word_lvl", "Current word's learning lvl"),
+        *(
+            (f"lvl_{lvl}_words", f"Words in learning lvl {lvl}")
+            for lvl in range(max_lvl + 1)
+        ),
+        ("answers_today", "Answers today"),
+        ("accuracy_today", "Accuracy today"),
+        ("accuracy_week", "Accuracy last 7 days"),
+        ("response_time", "Mean response time"),
+    ]
+
+
+def _percent(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 100:.0f}%"
+
+
+def statistics_values(progress: Progress) -> Dict[str, str]:
+    values = {
+        "words_in_db": str(progress.words_in_db),
+        "studied_words": str(progress.studied_words),
+        "current_word_lvl": str(progress.current_word_lvl),
+    }
+    for lvl, words in enumerate(progress.words_in_lvl):
+        values[f"lvl_{lvl}_words"] = str(words)
+
+    last_day = today()
+    day = total(progress.days, last_day, last_day)
+    week = total(progress.days, last_day - 6, last_day)
+    previous_week = total(progress.days, last_day - 13, last_day - 7)
+    trend = ""
+    if week.accuracy is not None and previous_week.accuracy is not None:
+        trend = f" ({(week.accuracy - previous_week.accuracy) * 100:+.0f})"
+    mean_response_ms = week.mean_response_ms
+    values["answers_today"] = str(day.answers)
+    values["accuracy_today"] = _percent(day.accuracy)
+    values["accuracy_week"] = _percent(week.accuracy) + trend
+    values["response_time"] = (
+        "-" if mean_response_ms is None else f"{mean_response_ms / 1000:.1f} s"
+    )
+    return values
+
+
+class StatisticsView:
+
+    def __init__(self) -> None:
+        self._shown: Dict[str, str] = {}
+
+    def changes(self, progress: Progress) -> Dict[str, str]:
+        changed = {
+            key: text
+            for key, text in statistics_values(progress).items()
+            if self._shown.get(key) != text
+        }
+        self._shown.update(changed)
+        return changed
@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from typing import Dict, List
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+from csv_reader import CsvReader
+from databse_handler import DatabaseHandler
+from gui import MainWindow
+from main import Config
+
+
+def create_deck(db_name: str, table_name: str, words: int) -> None:
+    ids = range(1, words + 1)
+    df = pd.DataFrame(
+        {
+            "id": list(ids),
+            "Level": ["A1" for _ in ids],
+            "Artikel": ["der" for _ in ids],
+            "Deutsch": [f"Wort{i}" for i in ids],
+            "Plural": [f"Wörter{i}" for i in ids],
+            "Englisch": [f"word {i}" for i in ids],
+            "Beispielsatz": [f"Das ist Wort{i}." for i in ids],
+        },
+        columns=CsvReader._required_columns,
+    )
+    db = DatabaseHandler(db_name)
+    db.initialize_db_by_df(table_name, df)
+    db.insert_df_into_db(table_name, df, bulk=True)
+    db.close()
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    result = {
+        f"p{p}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+        for p in (50, 95, 99)
+    }
+    result["max"] = ordered[-1]
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Submit answers in rapid bursts and record GUI frame times."
+    )
+    parser.add_argument("--words", type=int, default=10000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--burst-size", type=int, default=20)
+    parser.add_argument("--burst-interval-ms", type=int, default=250)
+    parser.add_argument("--frame-interval-ms", type=int, default=16)
+    args = parser.parse_args()
+
+    table_name = "de_en_vocabulary"
+    db_name = os.path.join(tempfile.mkdtemp(), "stress.db")
+    create_deck(db_name, table_name, args.words)
+
+    app = QApplication(sys.argv)
+    window = MainWindow(
+        Config(
+            spreadsheet_url="",
+            test_url="",
+            test_path="",
+            table_name=table_name,
+            db_name=db_name,
+        )
+    )
+    window.show()
+
+    frame_times: List[float] = []
+    last_frame = [time.perf_counter()]
+    submitted = [0]
+
+    def on_frame() -> None:
+        now = time.perf_counter()
+        frame_times.append((now - last_frame[0]) * 1000)
+        last_frame[0] = now
+
+    def on_burst() -> None:
+        for i in range(args.burst_size):
+            window._input_field.setText("der Wort1" if i % 2 else "wrong")
+            window._submit_input()
+        submitted[0] += args.burst_size
+
+    frame_timer = QTimer()
+    frame_timer.timeout.connect(on_frame)
+    frame_timer.start(args.frame_interval_ms)
+
+    burst_timer = QTimer()
+    burst_timer.timeout.connect(on_burst)
+    burst_timer.start(args.burst_interval_ms)
+
+    QTimer.singleShot(int(args.seconds * 1000), app.quit)
+    app.exec_()
+    window.stop_worker()
+
+    result = {
+        "answers_submitted": submitted[0],
+        "frame_interval_ms": args.frame_interval_ms,
+        "frame_time_ms": percentiles(frame_times[1:]),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import pytest
+
+from source_cache import SourceCache
+
+
+class DeckServer(ThreadingHTTPServer):
+    body = b""
+    etag = ""
+    requests: List[Optional[str]]
+
+
+class DeckHandler(BaseHTTPRequestHandler):
+    server: DeckServer
+
+    def do_GET(self) -> None:
+        if_none_match = self.headers.get("If-None-Match")
+        self.server.requests.append(if_none_match)
+        if if_none_match == self.server.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.server.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.server.etag)
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def deck_server() -> Iterator[Tuple[DeckServer, str]]:
+    server = DeckServer(("127.0.0.1", 0), DeckHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server, f"http://127.0.0.1:{server.server_address[1]}/deck.csv"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def read_bytes(path: str) -> bytes:
+    with open(path, "rb") as cached_file:
+        return cached_file.read()
+
+
+def test_fetch_revalidates_with_etag(
+    deck_server: Tuple[DeckServer, str], tmp_path: Path
+) -> None:
+    server, url = deck_server
+    cache = SourceCache(str(tmp_path))
+
+    server.body, server.etag = b"id,Deutsch\n1,Hund\n", '"v1"'
+    first = cache.fetch(url)
+    assert first.downloaded and not first.offline
+    assert read_bytes(first.path) == b"id,Deutsch\n1,Hund\n"
+
+    second = cache.fetch(url)
+    assert not second.downloaded and not second.offline
+    assert second.path == first.path
+    assert second.content_hash == first.content_hash
+    assert read_bytes(second.path) == b"id,Deutsch\n1,Hund\n"
+
+    server.body, server.etag = b"id,Deutsch\n1,Hund\n2,Katze\n", '"v2"'
+    third = cache.fetch(url)
+    assert third.downloaded and not third.offline
+    assert third.content_hash != first.content_hash
+    assert read_bytes(third.path) == b"id,Deutsch\n1,Hund\n2,Katze\n"
+
+    assert server.requests == [None, '"v1"', '"v1"']
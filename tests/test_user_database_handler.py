@@ -0,0 +1,88 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+import pandas as pd
+
+from csv_reader import CsvReader
+from user_database_handler import UserDatabaseHandler
+
+
+def deck(ids: Iterable[int]) -> List[pd.DataFrame]:
+    ids = list(ids)
+    return [
+        pd.DataFrame(
+            {
+                "id": ids,
+                "Level": ["A1" for _ in ids],
+                "Artikel": ["der" for _ in ids],
+                "Deutsch": [f"Wort{i}" for i in ids],
+                "Plural": [f"Wörter{i}" for i in ids],
+                "Englisch": [f"word {i}" for i in ids],
+                "Beispielsatz": [f"Das ist das Wort{i}." for i in ids],
+            },
+            columns=CsvReader._required_columns,
+        )
+    ]
+
+
+def progress_ids(db: UserDatabaseHandler, table_name: str) -> Set[int]:
+    db._cursor.execute(
+        f"SELECT id FROM {table_name}_user_progress WHERE user_id = ?", (db.user_id,)
+    )
+    return {row[0] for row in db._cursor.fetchall()}
+
+
+def level_counts(db: UserDatabaseHandler, table_name: str) -> Dict[int, int]:
+    db._cursor.execute(
+        f"SELECT lvl, words FROM {table_name}_user_stats WHERE user_id = ? AND words",
+        (db.user_id,),
+    )
+    return dict(db._cursor.fetchall())
+
+
+def test_reimport_with_delete_missing_reconciles_learners_by_id(tmp_path: Path) -> None:
+    db_name = str(tmp_path / "vocab.db")
+    anna = UserDatabaseHandler(db_name, "anna")
+    ben = UserDatabaseHandler(db_name, "ben")
+
+    anna.sync_batches_into_db("deck", deck([1, 2, 3]))
+    assert anna.get_level_histogram("deck") == {-1: 3}
+    assert ben.get_level_histogram("deck") == {-1: 3}
+    ben.set_learned_lvl("deck", 3, 2)
+    assert level_counts(ben, "deck") == {-1: 2, 2: 1}
+
+    anna.sync_batches_into_db("deck", deck([1, 2, 4]), delete_missing=True)
+    assert progress_ids(ben, "deck") == {1, 2}
+    assert level_counts(ben, "deck") == {-1: 2}
+
+    anna.get_level_histogram("deck")
+    assert progress_ids(anna, "deck") == {1, 2, 4}
+    assert level_counts(anna, "deck") == {-1: 3}
+
+    ben = UserDatabaseHandler(db_name, "ben")
+    ben.get_level_histogram("deck")
+    assert progress_ids(ben, "deck") == {1, 2, 4}
+    assert level_counts(ben, "deck") == {-1: 3}
+
+
+def test_shift_levels_keeps_schedule_consistent_with_levels(tmp_path: Path) -> None:
+    db = UserDatabaseHandler(str(tmp_path / "vocab.db"), "anna")
+    db.sync_batches_into_db("deck", deck([1, 2, 3]))
+    db.get_level_histogram("deck")
+    db._cursor.execute(
+        "UPDATE deck_user_progress SET learned_lvl = 5, repetitions = 9, interval = 300 "
+        "WHERE id = 2"
+    )
+    db._cursor.execute(
+        "UPDATE deck_user_progress SET learned_lvl = 4, repetitions = 6, interval = 40 "
+        "WHERE id = 3"
+    )
+    db._connection.commit()
+
+    db.shift_levels("deck", 1, ids=[1, 3])
+    db.shift_levels("deck", -1, ids=[2])
+    db._cursor.execute(
+        "SELECT id, learned_lvl, repetitions, interval FROM deck_user_progress ORDER BY id"
+    )
+    assert db._cursor.fetchall() == [(1, 0, 0, 0), (2, 4, 9, 179), (3, 5, 6, 180)]
+    assert db.recompute_levels("deck") == 0
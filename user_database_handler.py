@@ -0,0 +1,190 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Tuple
+
+from databse_handler import DatabaseHandler
+from import_report import ImportReport
+from word import MAX_LVL
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class UserDatabaseHandler(DatabaseHandler):
+    _progress_columns = (
+        "prog.id, prog.learned_lvl, prog.correct_translations, prog.correct_articles, "
+        "prog.incorrect_translations, prog.incorrect_articles, "
+        "prog.due_at, prog.interval, prog.ease, prog.repetitions"
+    )
+
+    def __init__(
+        self, db_name: str, user: str, wal: bool = True, busy_timeout: float = 5.0
+    ) -> None:
+        super().__init__(db_name, wal, busy_timeout)
+        self.user = user
+        self._cursor.execute(
+            "CREATE TABLE IF NOT EXISTS learners "
+            "(user_id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)"
+        )
+        self._cursor.execute(
+            "INSERT INTO learners (name) VALUES (?) ON CONFLICT (name) DO NOTHING",
+            (user,),
+        )
+        self._cursor.execute(
+            "CREATE TABLE IF NOT EXISTS learner_decks (user_id INTEGER NOT NULL, "
+            "table_name TEXT NOT NULL, version INTEGER NOT NULL, "
+            "PRIMARY KEY (user_id, table_name)) WITHOUT ROWID"
+        )
+        self._cursor.execute("SELECT user_id FROM learners WHERE name = ?", (user,))
+        self.user_id = int(self._cursor.fetchone()[0])
+        self._connection.commit()
+
+    def insert_batches_into_db(
+        self,
+        table_name: str,
+        batches: Iterable["pd.DataFrame"],
+        fast_pragmas: bool = False,
+    ) -> ImportReport:
+        report = super().insert_batches_into_db(table_name, batches, fast_pragmas)
+        self._prepared_tables.discard(table_name)
+        return report
+
+    def sync_batches_into_db(
+        self,
+        table_name: str,
+        batches: Iterable["pd.DataFrame"],
+        delete_missing: bool = False,
+        fast_pragmas: bool = False,
+    ) -> ImportReport:
+        report = super().sync_batches_into_db(
+            table_name, batches, delete_missing, fast_pragmas
+        )
+        self._prepared_tables.discard(table_name)
+        return report
+
+    def _delete_missing_rows(self, table_name: str) -> int:
+        deleted = super()._delete_missing_rows(table_name)
+        self._cursor.execute(
+            f"DELETE FROM {table_name}_user_progress "
+            "WHERE id NOT IN (SELECT id FROM sync_staging)"
+        )
+        return deleted
+
+    def _progress_scope(self, table_name: str) -> Tuple[str, str, Dict[str, Any]]:
+        return (
+            f"{table_name}_user_progress",
+            "user_id = :user_id",
+            {"user_id": self.user_id},
+        )
+
+    def _owns_progress_table(self, table_name: str) -> bool:
+        self._cursor.execute(
+            f"SELECT NOT EXISTS (SELECT 1 FROM {table_name}_user_stats "
+            "WHERE user_id <> ? AND words > 0)",
+            (self.user_id,),
+        )
+        return bool(self._cursor.fetchone()[0])
+
+    def get_number_of_studied_words(self, table_name: str) -> int:
+        histogram = self.get_level_histogram(table_name)
+        return sum(words for lvl, words in histogram.items() if lvl > -1)
+
+    def get_number_of_words_in_lvl(self, table_name: str, lvl: int) -> int:
+        return self.get_level_histogram(table_name).get(lvl, 0)
+
+    def _learner(self) -> str:
+        return self.user
+
+    def _learner_id(self) -> int:
+        return self.user_id
+
+    def _prepare_progress_table(self, table_name: str) -> None:
+        if table_name in self._prepared_tables:
+            return
+        super()._prepare_progress_table(table_name)
+        self._create_user_progress_table(table_name)
+        self._enroll_user(table_name)
+
+    def _create_user_progress_table(self, table_name: str) -> None:
+        previous_max_lvl = self._drop_stale_level_indexes(
+            f"{table_name}_user_progress"
+        )
+        if previous_max_lvl is not None:
+            self._cursor.execute(
+                f"DROP TRIGGER IF EXISTS {table_name}_user_stats_update"
+            )
+            self._recompute_all_levels(f"{table_name}_user_progress", previous_max_lvl)
+            self._cursor.execute(f"DELETE FROM {table_name}_user_stats")
+            self._cursor.execute(
+                f"INSERT INTO {table_name}_user_stats "
+                f"SELECT user_id, learned_lvl, COUNT(*) FROM {table_name}_user_progress "
+                "GROUP BY user_id, learned_lvl"
+            )
+        self._cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table_name}_user_progress ("
+            "user_id INTEGER NOT NULL, "
+            "id INTEGER NOT NULL, "
+            "learned_lvl INTEGER NOT NULL DEFAULT -1, "
+            "correct_translations INTEGER NOT NULL DEFAULT 0, "
+            "correct_articles INTEGER NOT NULL DEFAULT 0, "
+            "incorrect_translations INTEGER NOT NULL DEFAULT 0, "
+            "incorrect_articles INTEGER NOT NULL DEFAULT 0, "
+            "due_at REAL, "
+            "interval REAL NOT NULL DEFAULT 0, "
+            "ease REAL, "
+            "repetitions INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (user_id, id)) WITHOUT ROWID"
+        )
+        self._cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table_name}_user_progress_pool_idx "
+            f"ON {table_name}_user_progress(user_id, id) WHERE learned_lvl < {MAX_LVL}"
+        )
+        self._cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table_name}_user_progress_new_idx "
+            f"ON {table_name}_user_progress(user_id, id) WHERE learned_lvl = -1"
+        )
+        self._cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table_name}_user_progress_due_idx "
+            f"ON {table_name}_user_progress(user_id, due_at, id) "
+            f"WHERE learned_lvl >= 0 AND learned_lvl < {MAX_LVL}"
+        )
+        self._cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table_name}_user_stats ("
+            "user_id INTEGER NOT NULL, lvl INTEGER NOT NULL, words INTEGER NOT NULL, "
+            "PRIMARY KEY (user_id, lvl)) WITHOUT ROWID"
+        )
+
+        self._create_stats_triggers(
+            f"{table_name}_user_progress", f"{table_name}_user_stats", ("user_id",)
+        )
+        self._connection.commit()
+
+    def _enroll_user(self, table_name: str) -> None:
+        self._cursor.execute(
+            "SELECT version FROM learner_decks WHERE user_id = ? AND table_name = ?",
+            (self.user_id, table_name),
+        )
+        row = self._cursor.fetchone()
+        if row is not None and row[0] == self.get_deck_version(table_name):
+            return
+
+        try:
+            self._cursor.execute("BEGIN IMMEDIATE")
+            self._cursor.execute(
+                f"DELETE FROM {table_name}_user_progress WHERE user_id = ? "
+                f"AND id NOT IN (SELECT id FROM {table_name}_progress)",
+                (self.user_id,),
+            )
+            self._cursor.execute(
+                f"INSERT INTO {table_name}_user_progress (user_id, id) "
+                f"SELECT ?, id FROM {table_name}_progress WHERE true "
+                "ON CONFLICT (user_id, id) DO NOTHING",
+                (self.user_id,),
+            )
+            self._cursor.execute(
+                "INSERT INTO learner_decks VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id, table_name) DO UPDATE SET version = excluded.version",
+                (self.user_id, table_name, self.get_deck_version(table_name)),
+            )
+            self._connection.commit()
+        except BaseException:
+            self._connection.rollback()
+            raise
@@ -1,27 +1,69 @@
-from dataclasses import dataclass
-from typing import Tuple
+from typing import Any, NamedTuple, Optional, Tuple
+
+from scheduler import RETIRE_INTERVAL, Schedule, answer_quality, sm2
 
 MAX_LVL = 5
 
-@dataclass
-class Word:
-    id: str
-    level: str
-    article: str
+
+def schedule_lvl(schedule: Schedule) -> int:
+    if schedule.interval >= RETIRE_INTERVAL:
+        return MAX_LVL
+    return min(schedule.repetitions, MAX_LVL - 1)
+
+
+class Word(NamedTuple):
+    id: int
+    level: Optional[str]
+    article: Optional[str]
     deutsch: str
-    plural: str
+    plural: Optional[str]
     english: str
-    sample_phrase: str
-    id2: str
-    learned_lvl: str
-    correct_translations: str
-    correct_articles: str
-    incorrect_translations: str
-    incorrect_articles: str
+    sample_phrase: Optional[str]
+    id2: int
+    learned_lvl: int
+    correct_translations: int
+    correct_articles: int
+    incorrect_translations: int
+    incorrect_articles: int
+    due_at: Optional[float] = None
+    interval: float = 0
+    ease: Optional[float] = None
+    repetitions: int = 0
 
     @classmethod
     def from_tuple(
         cls,
-        word: Tuple[str, str, str, str, str, str, str, str, str, str, str, str, str],
+        word: Tuple[Any, ...],
     ) -> 'Word':
-        return cls(*word)
+        return cls._make(word)
+
+    def next_schedule(
+        self, correct_translation: bool, correct_article: bool, now: float
+    ) -> Schedule:
+        return sm2(
+            self.interval,
+            self.ease,
+            self.repetitions,
+            answer_quality(correct_translation, correct_article),
+            now,
+        )
+
+    def answered(
+        self, correct_translation: bool, correct_article: bool, now: float
+    ) -> 'Word':
+        schedule = self.next_schedule(correct_translation, correct_article, now)
+        return self._replace(
+            learned_lvl=schedule_lvl(schedule),
+            correct_translations=self.correct_translations + correct_translation,
+            correct_articles=self.correct_articles + correct_article,
+            incorrect_translations=self.incorrect_translations
+            + (not correct_translation),
+            incorrect_articles=self.incorrect_articles + (not correct_article),
+            due_at=schedule.due_at,
+            interval=schedule.interval,
+            ease=schedule.ease,
+            repetitions=schedule.repetitions,
+        )
+
+    def is_due(self, now: float) -> bool:
+        return self.due_at is None or self.due_at <= now
@@ -0,0 +1,115 @@
+import math
+import sys
+
+from array import array
+from bisect import bisect_left
+from typing import Any, Iterable, List, Optional, Tuple
+
+from word import Word
+
+_NULL_TEXT = "\x00"
+
+
+class WordStore:
+    _text_fields = ("level", "article", "deutsch", "plural", "english", "sample_phrase")
+
+    def __init__(self) -> None:
+        self._ids: "array[int]" = array("q")
+        self._text_offsets: List["array[int]"] = [
+            array("I", [0]) for _ in self._text_fields
+        ]
+        self._texts: List[bytearray] = [bytearray() for _ in self._text_fields]
+        self._learned_lvl: "array[int]" = array("b")
+        self._counters: List["array[int]"] = [array("i") for _ in range(4)]
+        self._due_at: "array[float]" = array("d")
+        self._interval: "array[float]" = array("d")
+        self._ease: "array[float]" = array("d")
+        self._repetitions: "array[int]" = array("i")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[Any, ...]]) -> "WordStore":
+        store = cls()
+        for row in rows:
+            store._append(Word.from_tuple(row))
+        return store
+
+    def _append(self, word: Word) -> None:
+        if self._ids and word.id <= self._ids[-1]:
+            raise ValueError("rows must be ordered by id")
+        self._ids.append(word.id)
+        for offsets, text, field in zip(
+            self._text_offsets, self._texts, word[1:7]
+        ):
+            text += (_NULL_TEXT if field is None else field).encode("utf-8")
+            offsets.append(len(text))
+        self._learned_lvl.append(word.learned_lvl)
+        for counter, count in zip(self._counters, word[9:13]):
+            counter.append(count)
+        self._due_at.append(math.nan if word.due_at is None else word.due_at)
+        self._interval.append(word.interval)
+        self._ease.append(math.nan if word.ease is None else word.ease)
+        self._repetitions.append(word.repetitions)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, id: int) -> bool:
+        return self._index(id) is not None
+
+    def _index(self, id: int) -> Optional[int]:
+        index = bisect_left(self._ids, id)
+        if index < len(self._ids) and self._ids[index] == id:
+            return index
+        return None
+
+    def get(self, id: int) -> Optional[Word]:
+        index = self._index(id)
+        return None if index is None else self.word_at(index)
+
+    def word_at(self, index: int) -> Word:
+        texts: List[Optional[str]] = []
+        for offsets, text in zip(self._text_offsets, self._texts):
+            value = text[offsets[index] : offsets[index + 1]].decode("utf-8")
+            texts.append(None if value == _NULL_TEXT else value)
+        due_at = self._due_at[index]
+        ease = self._ease[index]
+        id = self._ids[index]
+        return Word.from_tuple(
+            (
+                id,
+                *texts,
+                id,
+                self._learned_lvl[index],
+                *(counter[index] for counter in self._counters),
+                None if math.isnan(due_at) else due_at,
+                self._interval[index],
+                None if math.isnan(ease) else ease,
+                self._repetitions[index],
+            )
+        )
+
+    def update(self, word: Word) -> None:
+        index = self._index(word.id)
+        if index is None:
+            raise KeyError(word.id)
+        self._learned_lvl[index] = word.learned_lvl
+        for counter, count in zip(self._counters, word[9:13]):
+            counter[index] = count
+        self._due_at[index] = math.nan if word.due_at is None else word.due_at
+        self._interval[index] = word.interval
+        self._ease[index] = math.nan if word.ease is None else word.ease
+        self._repetitions[index] = word.repetitions
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [
+            self._ids,
+            self._learned_lvl,
+            self._due_at,
+            self._interval,
+            self._ease,
+            self._repetitions,
+            *self._counters,
+            *self._text_offsets,
+        ]
+        return sum(sys.getsizeof(column) for column in arrays + self._texts)